@@ -0,0 +1,121 @@
+import hashlib
+import marshal
+import os
+import sys
+import tempfile
+from array import array
+from collections import defaultdict
+from contextfreegrammar import CharacterClass, Sequence
+
+# content addressed on-disk cache for the analysis of grammars and their lookahead tables.
+# Entries are keyed by a hash of the canonical grammar specification and stored with marshal,
+# which only supports builtin types but loads considerably faster than pickle.
+# Entries written by another format version or Python implementation are considered stale
+class AnalysisCache:
+
+    # has to be increased whenever the layout of the stored entries or the results of the
+    # analysis change
+    version = 4
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    # canonical hash of a grammar specification, independent of the order in which symbols and
+    # alternatives are given
+    @staticmethod
+    def key(startSymbol, terminals, nonTerminals, productions):
+        canonical = (
+            startSymbol,
+            sorted(map(canonicalSymbol, set(terminals)), key=repr),
+            sorted(set(nonTerminals)),
+            sorted((A, sorted({tuple(map(canonicalSymbol, alternative)) for alternative in alternatives}, key=repr)) for A, alternatives in productions.items()),
+        )
+        return hashlib.sha256(repr(canonical).encode("utf-8")).hexdigest()
+
+    def stamp(self):
+        return (self.version, sys.implementation.cache_tag, array("i").itemsize)
+
+    def path(self, key, kind):
+        return os.path.join(self.directory, f"{key}.{kind}")
+
+    def read(self, key, kind):
+        try:
+            with open(self.path(key, kind), "rb") as file:
+                stamp, payload = marshal.loads(file.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        return payload if stamp == self.stamp() else None
+
+    # entries are written to a temporary file first, such that concurrent readers never see
+    # partially written entries
+    def write(self, key, kind, payload):
+        descriptor, temporaryPath = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(marshal.dumps((self.stamp(), payload)))
+        os.replace(temporaryPath, self.path(key, kind))
+
+    def loadGrammar(self, grammar, startSymbol, terminals, nonTerminals, productions):
+        grammar.cacheKey = self.key(startSymbol, terminals, nonTerminals, productions)
+        payload = self.read(grammar.cacheKey, "grammar")
+        if payload is None:
+            return False
+
+        grammar.startSymbol = payload["startSymbol"]
+        grammar.terminals = set(map(decodeSymbol, payload["terminals"]))
+        grammar.nonTerminals = set(payload["nonTerminals"])
+        grammar.delta = {A:[decodeSequence(rightHandSide) for rightHandSide in alternatives] for A, alternatives in payload["delta"].items()}
+        grammar.computeSymbolIds()
+        grammar.isNullable = {decodeSymbol(symbol):nullable for symbol, nullable in payload["isNullable"].items()}
+        grammar.epsilonFreeFirst1Set = defaultdict(set, {A:set(map(decodeSymbol, symbols)) for A, symbols in payload["epsilonFreeFirst1Set"].items()})
+        grammar.first1Set = defaultdict(set, {A:set(map(decodeSymbol, symbols)) for A, symbols in payload["first1Set"].items()})
+        grammar.follow1Set = defaultdict(set, {A:set(map(decodeSymbol, symbols)) for A, symbols in payload["follow1Set"].items()})
+        grammar.LL1Conflicts = [(A, decodeSequence(alternative1), decodeSequence(alternative2)) for A, alternative1, alternative2 in payload["LL1Conflicts"]]
+        return True
+
+    def storeGrammar(self, grammar):
+        self.write(grammar.cacheKey, "grammar", {
+            "startSymbol": grammar.startSymbol,
+            "terminals": frozenset(map(encodeSymbol, grammar.terminals)),
+            "nonTerminals": frozenset(grammar.nonTerminals),
+            "delta": {A:[encodeSequence(rightHandSide) for rightHandSide in alternatives] for A, alternatives in grammar.delta.items()},
+            "isNullable": {encodeSymbol(symbol):nullable for symbol, nullable in grammar.isNullable.items()},
+            "epsilonFreeFirst1Set": {A:frozenset(map(encodeSymbol, symbols)) for A, symbols in grammar.epsilonFreeFirst1Set.items()},
+            "first1Set": {A:frozenset(map(encodeSymbol, symbols)) for A, symbols in grammar.first1Set.items()},
+            "follow1Set": {A:frozenset(map(encodeSymbol, symbols)) for A, symbols in grammar.follow1Set.items()},
+            "LL1Conflicts": [(A, encodeSequence(alternative1), encodeSequence(alternative2)) for A, alternative1, alternative2 in grammar.LL1Conflicts],
+        })
+
+    def loadLookaheadTable(self, parser):
+        payload = self.read(parser.grammar.cacheKey, "table")
+        if payload is None:
+            return False
+
+        parser.width = payload["width"]
+        parser.lookaheadTable = array("i")
+        parser.lookaheadTable.frombytes(payload["lookaheadTable"])
+        return True
+
+    def storeLookaheadTable(self, parser):
+        self.write(parser.grammar.cacheKey, "table", {
+            "width": parser.width,
+            "lookaheadTable": parser.lookaheadTable.tobytes(),
+        })
+
+
+# marshal only supports builtin types, character classes are stored as tagged tuples
+def encodeSymbol(symbol):
+    return ("CharacterClass", symbol.specification) if isinstance(symbol, CharacterClass) else symbol
+
+def decodeSymbol(symbol):
+    return CharacterClass(symbol[1]) if isinstance(symbol, tuple) else symbol
+
+def encodeSequence(sequence):
+    return tuple(map(encodeSymbol, sequence))
+
+def decodeSequence(sequence):
+    return Sequence(map(decodeSymbol, sequence))
+
+# equal character classes have the same canonical form regardless of their specification
+def canonicalSymbol(symbol):
+    return ("CharacterClass", symbol.intervals) if isinstance(symbol, CharacterClass) else symbol
@@ -0,0 +1,2 @@
+# benchmarks for the grammar analysis and the parsers, run them from the src directory with
+#   python -m benchmark --output results.json
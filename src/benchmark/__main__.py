@@ -0,0 +1,23 @@
+import argparse
+import sys
+import unicode
+from benchmark.scenarios import runBenchmarks, compareResults, writeResults, readResults
+
+argumentParser = argparse.ArgumentParser(prog="python -m benchmark", description="Benchmarks the grammar analysis and the parsers")
+argumentParser.add_argument("--output", default="benchmark.json", help="file the results are written to as JSON")
+argumentParser.add_argument("--quick", action="store_true", help="only run small grammars with few repetitions")
+argumentParser.add_argument("--seed", type=int, default=0, help="seed of the grammar and sentence generators")
+argumentParser.add_argument("--compare", metavar="PREVIOUS", help="results of a previous run to check for regressions")
+argumentParser.add_argument("--tolerance", type=float, default=0.1, help="relative slowdown which is reported as a regression")
+arguments = argumentParser.parse_args()
+
+results = runBenchmarks(quick=arguments.quick, seed=arguments.seed)
+writeResults(results, arguments.output)
+print(f"results written to {arguments.output}")
+
+if arguments.compare:
+    regressions = compareResults(readResults(arguments.compare), results, tolerance=arguments.tolerance)
+    for measurement, oldSeconds, newSeconds, ratio in regressions:
+        print(f"regression: {dict(measurement)} {oldSeconds:.6f}s {unicode.rightArrow} {newSeconds:.6f}s ({ratio:.2f}x)")
+    if regressions:
+        sys.exit(1)
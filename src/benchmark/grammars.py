@@ -0,0 +1,52 @@
+import random
+from contextfreegrammar import Grammar
+
+# generates the specification of a random LL(1) grammar, which can be passed to Grammar as
+# keyword arguments.
+#   numberOfNonTerminals   size of the grammar
+#   alternatives           number of alternatives per nonterminal
+#   alphabetSize           number of terminals, at least alternatives + 2
+#   nestingProbability     probability of an alternative "( A )" nesting a nonterminal A
+#   nullableDensity        fraction of nonterminals with an epsilon alternative
+#
+# Every alternative starts with a terminal of its own, so alternatives can only conflict with an
+# epsilon alternative. Epsilon alternatives causing conflicts are removed until the grammar is LL(1)
+def syntheticGrammar(numberOfNonTerminals=20, alternatives=3, alphabetSize=10, nestingProbability=0.2, nullableDensity=0.3, seed=0):
+    if alphabetSize < alternatives + 2:
+        raise ValueError("The alphabet needs at least two terminals more than there are alternatives")
+
+    rnd = random.Random(seed)
+    nonTerminals = [f"N{i}" for i in range(numberOfNonTerminals)]
+    terminals = [f"t{i}" for i in range(alphabetSize - 2)]
+    opening, closing = "(", ")"
+
+    productions = dict()
+    for i, A in enumerate(nonTerminals):
+        leadingTerminals = rnd.sample(terminals, min(alternatives, len(terminals)))
+        # the first alternative terminates, the following ones refer to other nonterminals, where
+        # the next nonterminal is always referred to in order to keep all nonterminals reachable
+        productions[A] = [[leadingTerminals[0]]]
+        for index, leadingTerminal in enumerate(leadingTerminals[1:]):
+            rightHandSide = [leadingTerminal]
+            if index == 0 and i + 1 < numberOfNonTerminals:
+                rightHandSide.append(nonTerminals[i + 1])
+            for _ in range(rnd.randint(0, 2)):
+                if rnd.random() < nestingProbability:
+                    rightHandSide += [opening, rnd.choice(nonTerminals), closing]
+                elif rnd.random() < 0.5:
+                    rightHandSide.append(rnd.choice(nonTerminals))
+                else:
+                    rightHandSide.append(rnd.choice(terminals))
+            productions[A].append(rightHandSide)
+        if rnd.random() < nullableDensity:
+            productions[A].append([])
+
+    specification = dict(startSymbol=nonTerminals[0], terminals=terminals + [opening, closing], nonTerminals=nonTerminals, productions=productions)
+
+    while True:
+        grammar = Grammar(**specification)
+        if grammar.isLL1():
+            return specification
+        for A, alternative1, alternative2 in grammar.LL1Conflicts:
+            if [] in productions[A] and (not alternative1 or not alternative2):
+                productions[A].remove([])
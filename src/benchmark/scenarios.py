@@ -0,0 +1,138 @@
+import json
+import platform
+import random
+import time
+from collections import defaultdict
+from contextfreegrammar import Grammar
+from ll1parser import LL1Parser
+from benchmark.grammars import syntheticGrammar
+from benchmark.sentences import randomSentence, mutatedSentence
+
+# increased whenever the layout of the results changes
+resultVersion = 1
+
+# grammar sizes of the benchmark, the quick configuration only runs the first two
+grammarConfigurations = {
+    "small": dict(numberOfNonTerminals=10, alternatives=3, alphabetSize=8, nestingProbability=0.2, nullableDensity=0.3),
+    "medium": dict(numberOfNonTerminals=200, alternatives=5, alphabetSize=60, nestingProbability=0.2, nullableDensity=0.3),
+    "large": dict(numberOfNonTerminals=2000, alternatives=8, alphabetSize=400, nestingProbability=0.1, nullableDensity=0.2),
+    "nested": dict(numberOfNonTerminals=50, alternatives=3, alphabetSize=10, nestingProbability=0.8, nullableDensity=0.1),
+}
+
+def timed(function, repetitions):
+    timings = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def analysisBenchmarks(name, specification, repetitions):
+    results = []
+    for engine, bitsets in (("sets", False), ("bitsets", True)):
+        phaseTimings = defaultdict(list)
+        for _ in range(repetitions):
+            grammar = Grammar(**specification, bitsets=bitsets)
+            phaseTimings["total"].append(sum(grammar.phaseTimings.values()))
+            for phase, seconds in grammar.phaseTimings.items():
+                phaseTimings[phase].append(seconds)
+        for phase, timings in phaseTimings.items():
+            results.append({"scenario": "analysis", "grammar": name, "engine": engine, "phase": phase, "seconds": min(timings)})
+
+    grammar = Grammar(**specification)
+    parser = LL1Parser(grammar)
+    seconds = timed(parser.computeLookaheadTable, repetitions)
+    results.append({"scenario": "lookaheadTable", "grammar": name, "seconds": seconds, "cells": len(parser.lookaheadTable)})
+    return results
+
+def parseBenchmarks(name, specification, repetitions, numberOfSentences, seed):
+    grammar = Grammar(**specification)
+    parser = LL1Parser(grammar)
+    rnd = random.Random(seed)
+    inputs = {
+        "valid": [randomSentence(grammar, rnd) for _ in range(numberOfSentences)],
+        "invalid": rejectedSentences(grammar, parser, rnd, numberOfSentences),
+    }
+
+    engines = {
+        "items": lambda sentence: parser.parse(iter(sentence)),
+        "fast": lambda sentence: parser.parse(iter(sentence), fast=True),
+        "tree": lambda sentence: parser.parseTree(iter(sentence)),
+    }
+
+    results = []
+    for kind, sentences in inputs.items():
+        # all engines stop at the same token of a rejected sentence, the rest of it is never read
+        numberOfTokens = sum(map(len, sentences)) if kind == "valid" else sum(tokensRead(parser, sentence) for sentence in sentences)
+        for engine, parse in engines.items():
+            seconds = timed(lambda: [parse(sentence) for sentence in sentences], repetitions)
+            results.append({"scenario": "parse", "grammar": name, "input": kind, "engine": engine, "tokens": numberOfTokens,
+                            "seconds": seconds, "tokensPerSecond": numberOfTokens / seconds if seconds else None})
+    return results
+
+# mutated sentences which are not in the language, a mutation may happen to yield another sentence
+# of the language. Gives up after a bounded number of attempts, e.g. for a grammar of all words
+def rejectedSentences(grammar, parser, rnd, numberOfSentences):
+    sentences = []
+    for _ in range(10 * numberOfSentences):
+        if len(sentences) == numberOfSentences:
+            break
+        sentence = mutatedSentence(grammar, rnd)
+        if not parser.parse(iter(sentence), fast=True):
+            sentences.append(sentence)
+    return sentences
+
+# the number of tokens the parser reads of a sentence, including the token which is rejected
+def tokensRead(parser, sentence):
+    stream = parser.stream()
+    if stream.feed(sentence) is not False:
+        stream.finish()
+    return min(stream.position + 1, len(sentence))
+
+def runBenchmarks(quick=False, seed=0, log=print):
+    names = list(grammarConfigurations)[:2] if quick else list(grammarConfigurations)
+    repetitions = 1 if quick else 3
+    numberOfSentences = 50 if quick else 500
+
+    results = []
+    for name in names:
+        log(f"benchmarking grammar {name}")
+        specification = syntheticGrammar(**grammarConfigurations[name], seed=seed)
+        results += analysisBenchmarks(name, specification, repetitions)
+        results += parseBenchmarks(name, specification, repetitions, numberOfSentences, seed)
+
+    return {
+        "version": resultVersion,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "parameters": {"quick": quick, "seed": seed, "grammars": {name: grammarConfigurations[name] for name in names}},
+        "results": results,
+    }
+
+# the fields which identify a measurement, all others are measured values
+def identity(result):
+    return tuple((key, result[key]) for key in ("scenario", "grammar", "engine", "phase", "input") if key in result)
+
+# compares two result files and returns a list of (identity, old seconds, new seconds, ratio) for
+# every measurement which became slower by more than the given tolerance
+def compareResults(old, new, tolerance=0.1):
+    oldResults = {identity(result): result for result in old["results"]}
+    regressions = []
+    for result in new["results"]:
+        previous = oldResults.get(identity(result))
+        if previous is None or not previous["seconds"]:
+            continue
+        ratio = result["seconds"] / previous["seconds"]
+        if ratio > 1 + tolerance:
+            regressions.append((identity(result), previous["seconds"], result["seconds"], ratio))
+    return regressions
+
+def writeResults(results, path):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+
+def readResults(path):
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
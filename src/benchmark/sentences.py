@@ -0,0 +1,54 @@
+from contextfreegrammar import sequenceOrder
+
+# random sentences of a reduced grammar. Derivations are expanded with an explicit stack, where
+# beyond maxDepth nested expansions the alternative with the shortest derivation is chosen, such
+# that the derivation terminates. Alternatives are sorted, such that the sentences only depend
+# on the seed of rnd and not on the hash seed of the interpreter
+def randomSentence(grammar, rnd, maxDepth=20):
+    shortest = shortestAlternatives(grammar)
+    sortedAlternatives = {A:sorted(alternatives, key=sequenceOrder) for A, alternatives in grammar.delta.items()}
+    sentence = []
+    stack = [(grammar.startSymbol, 0)]
+    while stack:
+        symbol, depth = stack.pop()
+        if symbol not in grammar.nonTerminals:
+            sentence.append(symbol)
+            continue
+        rightHandSide = rnd.choice(sortedAlternatives[symbol]) if depth < maxDepth else shortest[symbol]
+        stack += [(B, depth + 1) for B in reversed(rightHandSide)]
+    return sentence
+
+# a sentence with a single token deleted, inserted or replaced, which is usually not in the
+# language any more
+def mutatedSentence(grammar, rnd, maxDepth=20):
+    sentence = randomSentence(grammar, rnd, maxDepth)
+    terminals = sorted(grammar.terminals, key=str)
+    position = rnd.randint(0, len(sentence))
+    match rnd.choice(["delete", "insert", "replace"]):
+        case "delete" if sentence:
+            del sentence[min(position, len(sentence) - 1)]
+        case "replace" if sentence:
+            sentence[min(position, len(sentence) - 1)] = rnd.choice(terminals)
+        case _:
+            sentence.insert(position, rnd.choice(terminals))
+    return sentence
+
+# for every nonterminal the alternative with the smallest derivation height, computed as a
+# fix point over all productions
+def shortestAlternatives(grammar):
+    height = dict()
+    shortest = dict()
+    changed = True
+    while changed:
+        changed = False
+        for A in sorted(grammar.delta):
+            for rightHandSide in sorted(grammar.delta[A], key=sequenceOrder):
+                heights = [height.get(B) if B in grammar.nonTerminals else 0 for B in rightHandSide]
+                if None in heights:
+                    continue
+                candidate = 1 + max(heights, default=0)
+                if candidate < height.get(A, float("inf")):
+                    height[A] = candidate
+                    shortest[A] = rightHandSide
+                    changed = True
+    return shortest
@@ -0,0 +1,182 @@
+import unicode
+from collections.abc import Mapping
+from tarjan import StronglyConnectedComponents
+
+# alternative engine for the attribute analyses of Grammar, which represents nullable, first and
+# follow sets as integers used as bitsets over the interned symbol ids. Bit t of a first or follow
+# set stands for the terminal with id t, the end of input is represented by the bit endOfInputId.
+# Merging two sets is a single integer operation instead of hashing every terminal
+class BitsetAnalysis:
+
+    def __init__(self, grammar):
+        self.grammar = grammar
+        self.numberOfNonTerminals = len(grammar.nonTerminalList)
+
+        # right hand sides are encoded with a nonterminal A as its id and a terminal t as ~t
+        self.productions = []
+        for A, rightHandSide in grammar.productionList:
+            encodedRightHandSide = tuple(grammar.nonTerminalIds[B] if B in grammar.nonTerminalIds else ~grammar.terminalIds[B] for B in rightHandSide)
+            self.productions.append((grammar.nonTerminalIds[A], encodedRightHandSide))
+
+        grammar.timedPhase("nullable", self.computeNullable)
+        grammar.timedPhase("first1", self.computeFirst1Bits)
+        grammar.timedPhase("follow1", self.computeFollow1Bits)
+        grammar.timedPhase("lookahead1", self.computeLookahead1Bits)
+
+    def computeNullable(self):
+        self.nullable = 0
+
+        numberOfNonNullableSymbols = [len(rightHandSide) for _, rightHandSide in self.productions]
+        rightHandSideOccurences = [[] for _ in range(self.numberOfNonTerminals)]
+        for production, (_, rightHandSide) in enumerate(self.productions):
+            for B in rightHandSide:
+                if B >= 0:
+                    rightHandSideOccurences[B].append(production)
+
+        productionsWithNullableRightHandSides = [production for production, count in enumerate(numberOfNonNullableSymbols) if count == 0]
+        while productionsWithNullableRightHandSides:
+            A, _ = self.productions[productionsWithNullableRightHandSides.pop()]
+            if self.nullable >> A & 1:
+                continue
+            self.nullable |= 1 << A
+            for occurence in rightHandSideOccurences[A]:
+                numberOfNonNullableSymbols[occurence] -= 1
+                if numberOfNonNullableSymbols[occurence] == 0:
+                    productionsWithNullableRightHandSides.append(occurence)
+
+    def isNullable(self, symbol):
+        return symbol >= 0 and self.nullable >> symbol & 1
+
+    def computeFirst1Bits(self):
+        self.epsilonFreeFirst1Bits = [0] * self.numberOfNonTerminals
+        variableDependencyGraph = {A:set() for A in range(self.numberOfNonTerminals)}
+
+        for A, rightHandSide in self.productions:
+            for B in rightHandSide:
+                if B >= 0:
+                    variableDependencyGraph[B].add(A)
+                else:
+                    self.epsilonFreeFirst1Bits[A] |= 1 << ~B
+                if not self.isNullable(B):
+                    break
+
+        self.propagate(self.epsilonFreeFirst1Bits, variableDependencyGraph)
+
+    def computeFollow1Bits(self):
+        self.follow1Bits = [0] * self.numberOfNonTerminals
+        variableDependencyGraph = {A:set() for A in range(self.numberOfNonTerminals)}
+
+        self.follow1Bits[self.grammar.nonTerminalIds[self.grammar.startSymbol]] |= 1 << self.grammar.endOfInputId
+
+        for A, rightHandSide in self.productions:
+            followingBits = 0
+            nullableSuffix = True
+            for B in reversed(rightHandSide):
+                if B >= 0:
+                    self.follow1Bits[B] |= followingBits
+                    if nullableSuffix:
+                        variableDependencyGraph[A].add(B)
+                    followingBits = (followingBits if self.isNullable(B) else 0) | self.epsilonFreeFirst1Bits[B]
+                else:
+                    followingBits = 1 << ~B
+                nullableSuffix = nullableSuffix and self.isNullable(B)
+
+        self.propagate(self.follow1Bits, variableDependencyGraph)
+
+    # forwards the bits along the edges of the dependency graph in the topological order of its
+    # strongly connected components, all members of a component end up with the same bits
+    def propagate(self, bits, variableDependencyGraph):
+        for component in reversed(StronglyConnectedComponents(variableDependencyGraph)):
+            componentBits = 0
+            for A in component:
+                componentBits |= bits[A]
+            for A in component:
+                bits[A] = componentBits
+                for B in variableDependencyGraph[A]:
+                    bits[B] |= componentBits
+
+    def sequenceFirst1Bits(self, rightHandSide):
+        first1Bits = 0
+        for B in rightHandSide:
+            first1Bits |= self.epsilonFreeFirst1Bits[B] if B >= 0 else 1 << ~B
+            if not self.isNullable(B):
+                return first1Bits, False
+        return first1Bits, True
+
+    # the lookahead symbols selecting each production, First1(rhs) concatenated with Follow1(A)
+    def computeLookahead1Bits(self):
+        self.lookahead1Bits = []
+        for A, rightHandSide in self.productions:
+            first1Bits, nullable = self.sequenceFirst1Bits(rightHandSide)
+            self.lookahead1Bits.append(first1Bits | self.follow1Bits[A] if nullable else first1Bits)
+
+    def LL1Conflicts(self):
+        conflicts = []
+        productionsOf = [[] for _ in range(self.numberOfNonTerminals)]
+        for production, (A, _) in enumerate(self.productions):
+            productionsOf[A].append(production)
+
+        for productions in productionsOf:
+            selectedBits = 0
+            for index, production in enumerate(productions):
+                lookahead1Bits = self.lookahead1Bits[production]
+                # the alternatives chosen before are only compared if there is an overlap at all
+                if lookahead1Bits & selectedBits:
+                    for earlierProduction in productions[:index]:
+                        if lookahead1Bits & self.lookahead1Bits[earlierProduction]:
+                            A, alternative1 = self.grammar.productionList[earlierProduction]
+                            conflicts.append((A, alternative1, self.grammar.productionList[production][1]))
+                selectedBits |= lookahead1Bits
+        return conflicts
+
+    def terminalIds(self, bits):
+        while bits:
+            lowestBit = bits & -bits
+            yield lowestBit.bit_length() - 1
+            bits ^= lowestBit
+
+    def terminals(self, bits):
+        endOfInput = self.grammar.endOfInputId
+        return {None if terminal == endOfInput else self.grammar.terminalList[terminal] for terminal in self.terminalIds(bits)}
+
+    # conversions to the attributes of the set based analysis of Grammar
+    def isNullableDict(self):
+        isNullable = {symbol:False for symbol in self.grammar.terminals}
+        for A, index in self.grammar.nonTerminalIds.items():
+            isNullable[A] = bool(self.nullable >> index & 1)
+        return isNullable
+
+    def epsilonFreeFirst1Sets(self):
+        return TerminalSets(self, self.epsilonFreeFirst1Bits)
+
+    def first1Sets(self):
+        return TerminalSets(self, self.epsilonFreeFirst1Bits, nullable=self.nullable)
+
+    def follow1Sets(self):
+        return TerminalSets(self, self.follow1Bits)
+
+
+# read only view of bitsets as a mapping from nonterminals to sets of terminals, every set is only
+# converted once it is accessed
+class TerminalSets(Mapping):
+
+    def __init__(self, analysis, bits, nullable=0):
+        self.analysis = analysis
+        self.bits = bits
+        self.nullable = nullable
+        self.converted = dict()
+
+    def __getitem__(self, A):
+        if A not in self.converted:
+            index = self.analysis.grammar.nonTerminalIds[A]
+            terminals = self.analysis.terminals(self.bits[index])
+            if self.nullable >> index & 1:
+                terminals.add(unicode.epsilon)
+            self.converted[A] = terminals
+        return self.converted[A]
+
+    def __iter__(self):
+        return iter(self.analysis.grammar.nonTerminalList)
+
+    def __len__(self):
+        return len(self.analysis.grammar.nonTerminalList)
@@ -1,11 +1,14 @@
 import unicode
-from collections import defaultdict
+from bisect import bisect_right
+from collections import defaultdict, deque
+from lexer import RegularExpressionParser
 from tarjan import StronglyConnectedComponents
-from itertools import combinations
+from bitsetanalysis import BitsetAnalysis
+from instrumentation import timedPhase
 
 class Grammar:
 
-    def __init__(self, startSymbol, terminals, nonTerminals, productions):
+    def __init__(self, startSymbol, terminals, nonTerminals, productions, cache=None, bitsets=False, instrumentation=None):
         
         if not startSymbol in set(nonTerminals):
             raise ValueError(f"Start symbol {startSymbol} {unicode.notElementOf} N")
@@ -22,22 +25,443 @@ class Grammar:
         if set(terminals) & set(nonTerminals):
             raise ValueError(f"The set of terminals and nonterminals are not disjoint: {unicode.Sigma} {unicode.setUnion} N = {set(terminals) & set(nonTerminals)}")
 
-        # a context free grammar is defined by:
+        # a token must not match more than one terminal
+        characterClasses = [a for a in set(terminals) if isinstance(a, CharacterClass)]
+        for index, characterClass in enumerate(characterClasses):
+            for otherClass in characterClasses[index+1:]:
+                if characterClass.overlaps(otherClass):
+                    raise ValueError(f"The character classes {characterClass} and {otherClass} are not disjoint")
+            for a in set(terminals):
+                if isinstance(a, str) and a in characterClass:
+                    raise ValueError(f"The terminal {a} {unicode.elementOf} {characterClass}")
+
+        # wall time of every phase of the analysis in seconds, which is also reported to the hook
+        self.instrumentation = instrumentation
+        self.phaseTimings = dict()
+
+        self.cache = cache
+        self.bitsets = bitsets
+        # set by ParserRegistry, whose users share the grammar of their parser
+        self.shared = False
+
+        # the specification as given, from which the grammar is analysed again after edits which
+        # change the reduced grammar
         self.startSymbol = startSymbol
-        self.terminals = set(terminals)
-        self.nonTerminals = set(nonTerminals)
+        self.specifiedTerminals = set(terminals)
+        self.specifiedNonTerminals = set(nonTerminals)
+        self.specifiedProductions = {A:set(map(Sequence, alternatives)) for A, alternatives in productions.items()}
+
+        self.analyse()
+
+    # analyses the grammar of the specification from scratch
+    def analyse(self):
+        # an identical grammar which was analysed before is restored from the cache instead
+        self.bitsetAnalysis = None
+        self.cacheKey = None
+        cache = self.cache
+        if cache is not None and self.timedPhase("cacheLoad", lambda: cache.loadGrammar(self, self.startSymbol, self.specifiedTerminals, self.specifiedNonTerminals, self.specifiedProductions)):
+            return
+
+        # a context free grammar is defined by:
+        self.terminals = set(self.specifiedTerminals)
+        self.nonTerminals = set(self.specifiedNonTerminals)
         self.delta = defaultdict(set)
 
-        for leftHandSide, alternativeRightHandSides in productions.items():
-            self.delta[leftHandSide] = set(map(Sequence, alternativeRightHandSides))
+        for leftHandSide, alternativeRightHandSides in self.specifiedProductions.items():
+            self.delta[leftHandSide] = set(alternativeRightHandSides)
         
         # reduce and analyse grammar
-        self.reduce()
-        self.computeEmptyAttributes()
-        self.computeFirst1Sets()
-        self.computeFollow1Sets()
-        self.computeLL1Conflicts()
+        self.timedPhase("reduce", self.reduce)
+        self.timedPhase("symbolIds", self.computeSymbolIds)
+        if self.bitsets:
+            # the bitset based analysis provides the attributes as views converting on access
+            self.bitsetAnalysis = BitsetAnalysis(self)
+            self.isNullable = self.bitsetAnalysis.isNullableDict()
+            self.epsilonFreeFirst1Set = self.bitsetAnalysis.epsilonFreeFirst1Sets()
+            self.first1Set = self.bitsetAnalysis.first1Sets()
+            self.follow1Set = self.bitsetAnalysis.follow1Sets()
+            self.LL1Conflicts = self.timedPhase("conflicts", self.bitsetAnalysis.LL1Conflicts)
+        else:
+            self.timedPhase("nullable", self.computeEmptyAttributes)
+            self.timedPhase("first1", self.computeFirst1Sets)
+            self.timedPhase("follow1", self.computeFollow1Sets)
+            self.timedPhase("conflicts", self.computeLL1Conflicts)
+
+        if cache is not None:
+            self.timedPhase("cacheStore", lambda: cache.storeGrammar(self))
+
+    def timedPhase(self, name, function):
+        return timedPhase(name, function, self.phaseTimings, self.instrumentation)
+
+    def checkEditable(self):
+        if self.shared:
+            raise RuntimeError("Cannot edit a grammar which is shared by a ParserRegistry")
     
+    # adds the production A -> rightHandSide and updates the analysis. If the reduced grammar keeps
+    # its nonterminals, only the attributes depending on the edit are computed again, see
+    # updateAttributes, and the nonterminals whose lookahead symbols changed are returned, which
+    # can be passed to LL1Parser.update. Otherwise the grammar is analysed from scratch and None
+    # is returned
+    def addProduction(self, A, rightHandSide):
+        self.checkEditable()
+        rightHandSide = Sequence(rightHandSide)
+        if A not in self.specifiedNonTerminals:
+            raise ValueError(f"{A} {unicode.notElementOf} N")
+        for symbol in rightHandSide:
+            if symbol not in self.specifiedTerminals and symbol not in self.specifiedNonTerminals:
+                raise ValueError(f"{symbol} {unicode.notElementOf} {unicode.Sigma} {unicode.setUnion} N")
+
+        alternatives = self.specifiedProductions.setdefault(A, set())
+        if rightHandSide in alternatives:
+            return set()
+        alternatives.add(rightHandSide)
+
+        # a production of a reachable, productive nonterminal over productive symbols changes
+        # neither productivity nor reachability. The start symbol is kept by the reduction even if
+        # it is unproductive, in which case it has no productions
+        if self.bitsetAnalysis is not None or A not in self.nonTerminals or not self.delta[A] or any(B not in self.nonTerminals and B not in self.terminals for B in rightHandSide):
+            self.timedPhase("reanalyse", self.analyse)
+            return None
+        self.delta[A].append(rightHandSide)
+        production = len(self.productionList)
+        self.productionList.append((A, rightHandSide))
+        self.productionIds[(A, rightHandSide)] = production
+        self.editedProductions.append(production)
+        for B in set(rightHandSide):
+            if B in self.nonTerminals:
+                self.occurences[B].append((A, rightHandSide))
+        return self.timedPhase("update", lambda: self.updateAttributes(A, rightHandSide, True))
+
+    # removes the production A -> rightHandSide and updates the analysis like addProduction
+    def removeProduction(self, A, rightHandSide):
+        self.checkEditable()
+        rightHandSide = Sequence(rightHandSide)
+        if rightHandSide not in self.specifiedProductions.get(A, ()):
+            raise ValueError(f"{A} {unicode.rightArrow} {rightHandSide} is not a production")
+        self.specifiedProductions[A].discard(rightHandSide)
+
+        # a production which was removed by the reduction does not take part in the analysis
+        if A not in self.nonTerminals or rightHandSide not in self.delta[A]:
+            return set()
+        # the last production of A, e.g. of the start symbol, leaves A unproductive
+        if self.bitsetAnalysis is not None or len(self.delta[A]) == 1 or not self.remainsReduced(A, rightHandSide):
+            self.timedPhase("reanalyse", self.analyse)
+            return None
+        self.delta[A].remove(rightHandSide)
+        # the last production takes over the id of the removed one
+        production = self.productionIds.pop((A, rightHandSide))
+        lastProduction = self.productionList.pop()
+        if production < len(self.productionList):
+            self.productionList[production] = lastProduction
+            self.productionIds[lastProduction] = production
+        self.editedProductions += [production, len(self.productionList)]
+        for B in set(rightHandSide):
+            if B in self.nonTerminals:
+                self.occurences[B].remove((A, rightHandSide))
+        return self.timedPhase("update", lambda: self.updateAttributes(A, rightHandSide, False))
+
+    # whether all nonterminals stay productive and reachable without the given production, in
+    # which case the reduced grammar only loses this production. Productivity is only computed
+    # again for the nonterminals which derive A, reachability is only searched for the
+    # nonterminals of the right hand side. The start symbol is kept by the reduction even if it
+    # becomes unproductive, hence the reduced nonterminals alone would not tell
+    def remainsReduced(self, A, rightHandSide):
+        removedProduction = (A, rightHandSide)
+        remainingAlternatives = lambda B: [alternative for alternative in self.delta[B] if (B, alternative) != removedProduction]
+
+        if not any(all(B not in self.nonTerminals for B in alternative) for alternative in remainingAlternatives(A)):
+            derivingNonTerminals = self.dependents({A}, lambda B: [C for C, _ in self.occurences[B]])
+            numberOfUnproductiveNonTerminals = dict()
+            rightHandSideOccurences = defaultdict(list)
+            productiveProductions = []
+            for B in derivingNonTerminals:
+                for alternative in remainingAlternatives(B):
+                    occuringNonTerminals = {C for C in alternative if C in derivingNonTerminals}
+                    numberOfUnproductiveNonTerminals[(B, alternative)] = len(occuringNonTerminals)
+                    for C in occuringNonTerminals:
+                        rightHandSideOccurences[C].append((B, alternative))
+                    if not occuringNonTerminals:
+                        productiveProductions.append((B, alternative))
+
+            productiveNonTerminals = set()
+            while productiveProductions:
+                B, _ = productiveProductions.pop()
+                if B not in productiveNonTerminals:
+                    productiveNonTerminals.add(B)
+                    for production in rightHandSideOccurences[B]:
+                        numberOfUnproductiveNonTerminals[production] -= 1
+                        if numberOfUnproductiveNonTerminals[production] == 0:
+                            productiveProductions.append(production)
+            if productiveNonTerminals != derivingNonTerminals:
+                return False
+
+        # a nonterminal below the right hand side which stays reachable through it is reachable
+        return all(self.reachableWithout(B, removedProduction) for B in set(rightHandSide) if B in self.nonTerminals)
+
+    # whether the start symbol derives B without the given production, searched breadth first
+    # from B upwards such that the search stops at the shortest derivation
+    def reachableWithout(self, B, removedProduction):
+        visited = {B}
+        worklist = deque([B])
+        while worklist:
+            C = worklist.popleft()
+            if C == self.startSymbol:
+                return True
+            for D, alternative in self.occurences[C]:
+                if D not in visited and (D, alternative) != removedProduction:
+                    visited.add(D)
+                    worklist.append(D)
+        return False
+
+    # updates the nullability after the production A -> rightHandSide was added or removed and
+    # returns the nonterminals whose nullability changed. An added production can only make A
+    # and the nonterminals above it nullable. A removed one can only change the nullable
+    # nonterminals which derive the empty word through A, these are reset and computed again
+    def updateNullable(self, A, rightHandSide, added):
+        isNullableAlternative = lambda alternative: all(self.isNullable[C] for C in alternative)
+        if not isNullableAlternative(rightHandSide) or added and self.isNullable[A]:
+            return set()
+
+        if added:
+            candidates = set()
+            worklist = [A]
+        else:
+            candidates = self.dependents({A}, lambda B: [C for C, alternative in self.occurences[B] if self.isNullable[C] and isNullableAlternative(alternative)])
+            for B in candidates:
+                self.isNullable[B] = False
+            worklist = [B for B in candidates if any(map(isNullableAlternative, self.delta[B]))]
+
+        nullableNonTerminals = set()
+        while worklist:
+            B = worklist.pop()
+            if self.isNullable[B]:
+                continue
+            self.isNullable[B] = True
+            nullableNonTerminals.add(B)
+            for C, alternative in self.occurences[B]:
+                if not self.isNullable[C] and isNullableAlternative(alternative):
+                    worklist.append(C)
+        return nullableNonTerminals if added else candidates - nullableNonTerminals
+
+    # updates the attributes after the production A -> rightHandSide was added or removed, see
+    # updateNullable for the nullable attribute. First1 and Follow1 sets are repaired from the
+    # contributions which changed, see repairFixpoint: the edited production and the alternatives
+    # next to a nonterminal whose attributes changed. Conflicts are only checked again for the
+    # nonterminals whose lookahead symbols may have changed, which are returned
+    def updateAttributes(self, A, rightHandSide, added):
+        occurences = self.occurences
+        changedNullable = self.updateNullable(A, rightHandSide, added)
+        wasNullable = lambda C: self.isNullable[C] != (C in changedNullable)
+
+        # First1: the nullable prefixes of the edited production and of the alternatives in which a
+        # nonterminal changed its nullability are collected again, and on removal the symbols they
+        # gave before may have been lost. Adding a production only lets nullability and the First1
+        # and Follow1 sets grow, so no symbol is lost then
+        isNullable = self.isNullable.__getitem__
+        changedAlternatives = [(A, rightHandSide)] + [production for B in changedNullable for production in occurences[B]]
+        lostFirst1 = defaultdict(set)
+        for C, alternative in changedAlternatives if not added else []:
+            lostFirst1[C] |= self.prefixFirst1(alternative, wasNullable)
+        previousFirst1Sets = self.repairFixpoint(
+            self.epsilonFreeFirst1Set,
+            {C for C, _ in changedAlternatives},
+            lostFirst1,
+            lambda B: {C for alternative in self.delta[B] for C in self.nullablePrefix(alternative) if C in self.terminals},
+            lambda B: set().union(*(self.prefixFirst1(alternative, isNullable) for alternative in self.delta[B])),
+            lambda B: [C for C, alternative in occurences[B] if self.inNullablePrefix(B, alternative)],
+            lambda B: [C for alternative in self.delta[B] for C in self.nullablePrefix(alternative) if C in self.nonTerminals])
+        changedFirst1 = {B for B, previousSet in previousFirst1Sets.items() if self.epsilonFreeFirst1Set[B] != previousSet}
+        for B in changedFirst1 | changedNullable:
+            self.first1Set[B] = self.epsilonFreeFirst1Set[B] | ({unicode.epsilon} if self.isNullable[B] else set())
+
+        # Follow1: an occurence contributes the First1 set of its suffix, and the Follow1 set of the
+        # left hand side if the suffix is nullable. The contributions of the occurences in the edited
+        # production and in the alternatives next to a nonterminal whose attributes changed are
+        # collected again, and on removal the symbols they gave before may have been lost
+        wasFirst1 = lambda C: previousFirst1Sets.get(C, self.epsilonFreeFirst1Set[C])
+        changedAlternatives = [(A, rightHandSide)] + [production for B in changedFirst1 | changedNullable for production in occurences[B]]
+        seeds = {B for _, alternative in changedAlternatives for B in alternative if B in self.nonTerminals}
+        lostFollow1 = defaultdict(set)
+        for C, alternative in changedAlternatives if not added else []:
+            for index, B in enumerate(alternative):
+                if B in self.nonTerminals:
+                    lostFollow1[B] |= self.suffixFollow1(C, alternative[index+1:], wasNullable, wasFirst1)
+        previousFollow1Sets = self.repairFixpoint(
+            self.follow1Set,
+            seeds,
+            lostFollow1,
+            lambda B: self.occurenceFollow1(B, localOnly=True),
+            self.occurenceFollow1,
+            lambda B: [C for alternative in self.delta[B] for C in self.nullableSuffix(alternative) if C in self.nonTerminals],
+            lambda B: [C for C, alternative in occurences[B] if B in self.nullableSuffix(alternative)])
+        changedFollow1 = {B for B, previousSet in previousFollow1Sets.items() if self.follow1Set[B] != previousSet}
+
+        # the lookahead symbols of a production depend on First1 and nullability of its right hand
+        # side and on Follow1 of its left hand side
+        changedNonTerminals = {A} | changedFollow1
+        for B in changedFirst1 | changedNullable:
+            changedNonTerminals.update(C for C, _ in occurences[B])
+        self.LL1Conflicts = [conflict for conflict in self.LL1Conflicts if conflict[0] not in changedNonTerminals] + self.LL1ConflictsOf(changedNonTerminals)
+
+        # the production ids of an edited grammar differ from those of a fresh analysis of its
+        # specification, hence its tables are not shared through the cache any more
+        self.cacheKey = None
+        return changedNonTerminals
+
+    # repairs the least fixpoint of a set attribute after some contributions to it changed. The
+    # set of B is the union of local(B), the symbols contributed without the attribute itself, and
+    # of the sets of its predecessors, of which B is a successor. Hence a symbol belongs to the set
+    # of B exactly if some nonterminal from which B is reached contributes it locally. lostSymbols
+    # holds the symbols which the changed contributions gave before, and those a nonterminal cannot
+    # be reached with any more are deleted and forwarded to its successors. Then the seeds are
+    # collected again with recompute(B) and only the symbols they gain are forwarded. Returns the
+    # previous sets of all touched nonterminals
+    def repairFixpoint(self, attribute, seeds, lostSymbols, local, recompute, successors, predecessors):
+        localSets = dict()
+        def localSet(B):
+            if B not in localSets:
+                localSets[B] = local(B)
+            return localSets[B]
+        successorLists = dict()
+        def successorList(B):
+            if B not in successorLists:
+                successorLists[B] = successors(B)
+            return successorLists[B]
+
+        # searches backwards for the nonterminals contributing the symbols. If the search runs out,
+        # no nonterminal it visited is reached with the remaining symbols either, which later
+        # searches need not visit again
+        unreachedSymbols = defaultdict(set)
+        def unsupported(B, symbols):
+            visited = {B}
+            worklist = deque([B])
+            while worklist and symbols:
+                C = worklist.popleft()
+                symbols = symbols - localSet(C)
+                for D in predecessors(C) if symbols else []:
+                    if D not in visited and not symbols <= unreachedSymbols[D]:
+                        visited.add(D)
+                        worklist.append(D)
+            if symbols:
+                for C in visited:
+                    unreachedSymbols[C] |= symbols
+            return symbols
+
+        # symbols which reach a nonterminal while it waits in the worklist are forwarded together
+        def forward(pending, accept):
+            worklist = deque(pending)
+            while worklist:
+                B = worklist.popleft()
+                symbols = pending.pop(B)
+                for C in successorList(B):
+                    forwardedSymbols = accept(C, symbols)
+                    if forwardedSymbols:
+                        if C in pending:
+                            pending[C] = pending[C] | forwardedSymbols
+                        else:
+                            pending[C] = forwardedSymbols
+                            worklist.append(C)
+
+        previousSets = dict()
+        def delete(B, symbols):
+            symbols = symbols & attribute[B]
+            if symbols:
+                symbols = unsupported(B, symbols)
+            if symbols:
+                previousSets.setdefault(B, attribute[B])
+                attribute[B] = attribute[B] - symbols
+            return symbols
+        pending = dict()
+        for B, symbols in lostSymbols.items():
+            symbols = delete(B, symbols)
+            if symbols:
+                pending[B] = symbols
+        forward(pending, delete)
+
+        def add(B, symbols):
+            symbols = symbols - attribute[B]
+            if symbols:
+                previousSets.setdefault(B, attribute[B])
+                attribute[B] = attribute[B] | symbols
+            return symbols
+        pending = dict()
+        for B in seeds:
+            previousSets.setdefault(B, attribute[B])
+            symbols = add(B, recompute(B))
+            if symbols:
+                pending[B] = symbols
+        forward(pending, add)
+        return previousSets
+
+    # the epsilon free First1 set of the nullable prefix of a sequence, for the given nullability
+    # and First1 sets of the nonterminals
+    def prefixFirst1(self, sequence, isNullable, epsilonFreeFirst1Set=None):
+        symbols = set()
+        for C in sequence:
+            if C in self.nonTerminals:
+                symbols |= epsilonFreeFirst1Set(C) if epsilonFreeFirst1Set else self.epsilonFreeFirst1Set[C]
+            else:
+                symbols.add(C)
+            if not isNullable(C):
+                break
+        return symbols
+
+    # the symbols an occurence followed by the given suffix in an alternative of C contributes to
+    # the Follow1 set of the occuring nonterminal, for the given nullability and First1 sets
+    def suffixFollow1(self, C, suffix, isNullable, epsilonFreeFirst1Set=None):
+        symbols = self.prefixFirst1(suffix, isNullable, epsilonFreeFirst1Set)
+        if all(map(isNullable, suffix)):
+            symbols |= self.follow1Set[C]
+        return symbols
+
+    # the Follow1 set of B collected from its occurences, including the current Follow1 sets of
+    # the left hand sides of occurences with a nullable suffix unless only the local part is asked
+    def occurenceFollow1(self, B, localOnly=False):
+        symbols = {None} if B == self.startSymbol else set()
+        for C, alternative in self.occurences[B]:
+            for index, symbol in enumerate(alternative):
+                if symbol == B:
+                    followingSymbols = self.first1(alternative[index+1:])
+                    symbols |= followingSymbols - {unicode.epsilon}
+                    if unicode.epsilon in followingSymbols and not localOnly:
+                        symbols |= self.follow1Set[C]
+        return symbols
+
+    # the nonterminals reachable from the seeds over the edges given by successors
+    def dependents(self, seeds, successors):
+        reached = set()
+        worklist = list(seeds)
+        while worklist:
+            B = worklist.pop()
+            if B not in reached:
+                reached.add(B)
+                worklist += successors(B)
+        return reached
+
+    def inNullablePrefix(self, B, rightHandSide):
+        for C in rightHandSide:
+            if C == B:
+                return True
+            if not self.isNullable[C]:
+                return False
+        return False
+
+    def nullablePrefix(self, rightHandSide):
+        prefix = []
+        for C in rightHandSide:
+            prefix.append(C)
+            if not self.isNullable[C]:
+                break
+        return prefix
+
+    def nullableSuffix(self, rightHandSide):
+        suffix = []
+        for C in reversed(rightHandSide):
+            suffix.append(C)
+            if not self.isNullable[C]:
+                break
+        return suffix
+
     def productions(self):
         return [(A, rightHandSide) for A in self.delta for rightHandSide in self.delta[A]]
     
@@ -49,14 +473,14 @@ class Grammar:
         rightHandSideOccurences = defaultdict(set)
 
         # find non-terminals and register in which productions they appear, initially all 
-        # lefthand sides are registered as unproductive
+        # lefthand sides are registered as unproductive. A single pass over every right hand side
+        # suffices, where each distinct nonterminal of a right hand side is counted once
         for production in self.productions():
             (_, rightHandSide) = production
-            numberOfUnproductiveNonTerminals[production] = 0
-            for A in self.nonTerminals:
-                if A in rightHandSide:
-                    numberOfUnproductiveNonTerminals[production] += 1
-                    rightHandSideOccurences[A].add(production)
+            occuringNonTerminals = {A for A in rightHandSide if A in self.nonTerminals}
+            numberOfUnproductiveNonTerminals[production] = len(occuringNonTerminals)
+            for A in occuringNonTerminals:
+                rightHandSideOccurences[A].add(production)
         
         # fix-point algorithm implementing the AND-OR-GRAPH analysis for
         # the productiviy of a production
@@ -92,24 +516,54 @@ class Grammar:
         reachableAndProductiveNonTerminals = reachableNonTerminals
         self.nonTerminals = reachableAndProductiveNonTerminals
 
+    # interns the symbols of the reduced grammar as small integers, such that tables can be
+    # indexed directly instead of hashing symbols. The id len(terminals) is reserved for the end
+    # of input and productions are numbered by their position in productionList. Edits keep the
+    # ids of all productions but the edited one and the last, see addProduction and removeProduction
+    def computeSymbolIds(self):
+        self.terminalList = sorted(self.terminals, key=symbolOrder)
+        self.nonTerminalList = sorted(self.nonTerminals)
+        self.terminalIds = {a:i for i, a in enumerate(self.terminalList)}
+        self.nonTerminalIds = {A:i for i, A in enumerate(self.nonTerminalList)}
+        self.endOfInputId = len(self.terminalList)
+        self.productionList = sorted(self.productions(), key=productionOrder)
+        self.productionIds = {production:i for i, production in enumerate(self.productionList)}
+
+        # the productions in which a nonterminal occurs on the right hand side, which are kept up to
+        # date by addProduction and removeProduction
+        self.occurences = defaultdict(list)
+        for production in self.productionList:
+            for B in set(production[1]):
+                if B in self.nonTerminals:
+                    self.occurences[B].append(production)
+        # ids of the productions which were added, moved or removed since the grammar was analysed,
+        # such that LL1Parser.update only patches their rows
+        self.editedProductions = []
+
     # computes which nonterminals are capable of producing the empty word
     def computeEmptyAttributes(self):
         self.isNullable = {symbol:False for symbol in self.nonTerminals | self.terminals}
         
         numberOfNonNullableSymbols = dict()
-        rightHandSideOccurences = defaultdict(set)
+        rightHandSideOccurences = defaultdict(list)
 
+        # every occurence of a nonterminal is registered, such that a production A -> B B is
+        # counted down twice once B turns out to be nullable
         for production in self.productions():
             (A, rightHandSide) = production
             numberOfNonNullableSymbols[production] = len(rightHandSide)
-            for B in self.nonTerminals:
-                if B in rightHandSide:
-                    rightHandSideOccurences[B].add(production)
+            for B in rightHandSide:
+                if B in self.nonTerminals:
+                    rightHandSideOccurences[B].append(production)
 
         productionsWithNullableRightHandSides = {production for production, count in numberOfNonNullableSymbols.items() if count == 0}
         
         while productionsWithNullableRightHandSides:
             A, _ = productionsWithNullableRightHandSides.pop()
+            # the occurences of A must only be counted down once, even if A has several
+            # nullable alternatives
+            if self.isNullable[A]:
+                continue
             self.isNullable[A] = True
             for occurence in rightHandSideOccurences[A]:
                 numberOfNonNullableSymbols[occurence] -= 1
@@ -131,20 +585,7 @@ class Grammar:
                 if not self.isNullable[B]:
                     break
 
-        stronglyConnectedComponents = StronglyConnectedComponents(variableDependencyGraph)
-
-        # Tarjans algorithm for finding strongly connected components automatically induces
-        # a topological order, such that reversing the found list of SCC is sufficient for 
-        # forwarding the attributes correctly
-        stronglyConnectedComponents = list(reversed(stronglyConnectedComponents))
-
-        for component in stronglyConnectedComponents:
-            for A in component:
-                for B in component:
-                    self.epsilonFreeFirst1Set[A] |= self.epsilonFreeFirst1Set[B]
-
-                for B in variableDependencyGraph[A]:
-                    self.epsilonFreeFirst1Set[B] |= self.epsilonFreeFirst1Set[A]
+        self.propagate(self.epsilonFreeFirst1Set, variableDependencyGraph)
         
         self.first1Set = defaultdict(set)
         for A in self.nonTerminals:
@@ -159,38 +600,66 @@ class Grammar:
         #None represents the lookahead pointing to the end of input
         self.follow1Set[self.startSymbol].add(None)
 
+        # the right hand sides are scanned backwards, such that the symbols which can follow a
+        # position and whether the remaining suffix is nullable are known in a single pass
         for (A, rightHandSide) in self.productions():
-            for index, B in enumerate(rightHandSide):
+            followingSymbols = set()
+            nullableSuffix = True
+            for B in reversed(rightHandSide):
                 if B in self.nonTerminals:
-                    for C in rightHandSide[index+1:]:
-                        if C in self.nonTerminals:
-                            self.follow1Set[B] |= self.epsilonFreeFirst1Set[C]
-                        elif C in self.terminals:
-                            self.follow1Set[B].add(C)
-                        if not self.isNullable[C]:
-                            break
-
-                    if all(map(lambda x: self.isNullable[x], rightHandSide[index+1:])):
+                    self.follow1Set[B] |= followingSymbols
+                    if nullableSuffix:
                         variableDependencyGraph[A].add(B)
+                    if self.isNullable[B]:
+                        followingSymbols |= self.epsilonFreeFirst1Set[B]
+                    else:
+                        followingSymbols = set(self.epsilonFreeFirst1Set[B])
+                elif B in self.terminals:
+                    followingSymbols = {B}
+                nullableSuffix = nullableSuffix and self.isNullable[B]
+
+        self.propagate(self.follow1Set, variableDependencyGraph)
 
+    # forwards the attribute sets along the edges of the dependency graph
+    def propagate(self, attribute, variableDependencyGraph):
         stronglyConnectedComponents = StronglyConnectedComponents(variableDependencyGraph)
+
+        # Tarjans algorithm for finding strongly connected components automatically induces
+        # a topological order, such that reversing the found list of SCC is sufficient for 
+        # forwarding the attributes correctly
         stronglyConnectedComponents = list(reversed(stronglyConnectedComponents))
 
+        # all nonterminals of a component share the same set, which is collected once instead
+        # of merging every pair of nonterminals in the component
         for component in stronglyConnectedComponents:
+            componentSet = set().union(*(attribute[A] for A in component))
             for A in component:
-                for B in component:
-                    self.follow1Set[A] |= self.follow1Set[B]
+                attribute[A] = set(componentSet)
 
+            for A in component:
                 for B in variableDependencyGraph[A]:
-                    self.follow1Set[B] |= self.follow1Set[A]
+                    attribute[B] |= componentSet
 
     # analyze first1 and follow1 sets in order to determine possible LL(1) conflicts 
+    # by accumulating the lookahead symbols per nonterminal instead of comparing every pair
+    # of alternatives. Only conflicting alternatives are ever compared with each other
     def computeLL1Conflicts(self):
-        self.LL1Conflicts = []
-        for A in self.delta:
-            for alternative1, alternative2 in combinations(self.delta[A], 2):
-                if concat1(self.first1(alternative1), self.follow1Set[A]) & concat1(self.first1(alternative2), self.follow1Set[A]):
-                    self.LL1Conflicts.append((A, alternative1, alternative2))
+        self.LL1Conflicts = self.LL1ConflictsOf(self.delta)
+
+    def LL1ConflictsOf(self, nonTerminals):
+        LL1Conflicts = []
+        for A in nonTerminals:
+            selectingAlternatives = defaultdict(list)
+            for alternative in self.delta[A]:
+                conflictingAlternatives = dict()
+                for lookaheadSymbol in concat1(self.first1(alternative), self.follow1Set[A]):
+                    for earlierAlternative in selectingAlternatives[lookaheadSymbol]:
+                        conflictingAlternatives[earlierAlternative] = None
+                    selectingAlternatives[lookaheadSymbol].append(alternative)
+
+                for earlierAlternative in conflictingAlternatives:
+                    LL1Conflicts.append((A, earlierAlternative, alternative))
+        return LL1Conflicts
 
     def first1(self, sequence):
         if not sequence:
@@ -199,16 +668,45 @@ class Grammar:
             first1Set = set()
             for symbol in sequence:
                 if symbol in self.nonTerminals:
-                    first1Set |= self.first1Set[symbol]
+                    first1Set |= self.epsilonFreeFirst1Set[symbol]
                 elif symbol in self.terminals:
                     first1Set |= {symbol}
                 if not self.isNullable[symbol]:
-                    break
-            return first1Set
+                    return first1Set
+            # only a sequence of nullable symbols can produce the empty word
+            return first1Set | {unicode.epsilon}
 
     def isLL1(self):
         return not self.LL1Conflicts
 
+    # the nonterminals which derive regular languages. A nonterminal is regular if it refers to
+    # the nonterminals of its own strongly connected component only at the end of its alternatives
+    # and all other nonterminals it refers to are regular. Such nonterminals are not self-embedding,
+    # i.e. A =>+ uAv with nonempty u and v is impossible. Left recursion, which would be regular as
+    # well, does not occur in LL(1) grammars
+    def regularNonTerminals(self):
+        referenceGraph = {A:{B for rightHandSide in self.delta[A] for B in rightHandSide if B in self.nonTerminals} for A in self.nonTerminals}
+        regularNonTerminals = set()
+
+        # Tarjans algorithm finds a component after all components it refers to
+        for component in StronglyConnectedComponents(referenceGraph):
+            component = set(component)
+            if all(self.isRegularAlternative(rightHandSide, component, regularNonTerminals) for A in component for rightHandSide in self.delta[A]):
+                regularNonTerminals |= component
+        return regularNonTerminals
+
+    def isRegularAlternative(self, rightHandSide, component, regularNonTerminals):
+        for index, B in enumerate(rightHandSide):
+            if B in component:
+                if index != len(rightHandSide) - 1:
+                    return False
+            elif B in self.nonTerminals and B not in regularNonTerminals:
+                return False
+        return True
+
+    def isRegular(self):
+        return self.startSymbol in self.regularNonTerminals()
+
     def printConflicts(self):
         for A, alternative1, alternative2 in self.LL1Conflicts:
             lookaheadSymbols1 = concat1(self.first1(alternative1), self.follow1Set[A])
@@ -257,4 +755,68 @@ class Sequence(tuple):
             string = ""
             for symbol in self:
                 string += str(symbol) + " "
-            return string[:-1]
\ No newline at end of file
+            return string[:-1]
+
+# a set of characters which is used as a single terminal symbol, e.g. CharacterClass("a-zA-Z0-9_").
+# The specification uses the syntax of a character class in a regular expression without the
+# brackets, hence also supports escapes and negation. A token matches the class if it is a single
+# character contained in it
+class CharacterClass:
+
+    def __init__(self, specification):
+        self.specification = specification
+        parser = RegularExpressionParser(f"[{specification}]")
+        intervals = parser.atom()[1]
+        # e.g. "a]b" would otherwise silently become [a]
+        if parser.position != len(parser.pattern):
+            parser.fail("Unexpected characters behind the character class")
+
+        # merge overlapping and adjacent intervals, such that equal sets have equal intervals
+        self.intervals = []
+        for low, high in sorted(intervals):
+            if self.intervals and low <= self.intervals[-1][1] + 1:
+                self.intervals[-1] = (self.intervals[-1][0], max(high, self.intervals[-1][1]))
+            else:
+                self.intervals.append((low, high))
+        self.intervals = tuple(self.intervals)
+        self.lows = [low for low, _ in self.intervals]
+
+        # membership of the first 256 code points is a single bit test
+        self.bitmap = 0
+        for low, high in self.intervals:
+            for code in range(low, min(high, 255) + 1):
+                self.bitmap |= 1 << code
+
+    def __contains__(self, token):
+        if not isinstance(token, str) or len(token) != 1:
+            return False
+        return self.containsCode(ord(token))
+
+    def containsCode(self, code):
+        if code < 256:
+            return self.bitmap >> code & 1 == 1
+        index = bisect_right(self.lows, code) - 1
+        return index >= 0 and code <= self.intervals[index][1]
+
+    def overlaps(self, other):
+        return any(low <= otherHigh and otherLow <= high for low, high in self.intervals for otherLow, otherHigh in other.intervals)
+
+    def __eq__(self, other):
+        return isinstance(other, CharacterClass) and self.intervals == other.intervals
+
+    def __hash__(self):
+        return hash(self.intervals)
+
+    def __repr__(self):
+        return f"[{self.specification}]"
+
+# a total order on symbols, where character classes are ordered behind all other symbols
+def symbolOrder(symbol):
+    return (1, symbol.intervals) if isinstance(symbol, CharacterClass) else (0, symbol)
+
+def sequenceOrder(sequence):
+    return tuple(map(symbolOrder, sequence))
+
+def productionOrder(production):
+    A, rightHandSide = production
+    return (A, sequenceOrder(rightHandSide))
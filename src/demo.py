@@ -1,4 +1,4 @@
-from contextfreegrammar import Grammar
+from contextfreegrammar import CharacterClass, Grammar
 from ll1parser import LL1Parser
 
 startSymbol = "S"
@@ -30,18 +30,15 @@ if not nonLL1Grammar.isLL1():
 
 # example specification for a LL1 parser which parses regular expressions
 
-class CharacterRange:
-    def __new__(cls, start, end):
-        return [chr(integer) for integer in range(ord(start), ord(end)+1)]
-
-# define an LL(1) grammar for regex expressions over the alphabet a-z, A-Z and 0-9
+# define an LL(1) grammar for regex expressions over the alphabet a-z, A-Z and 0-9.
+# Instead of one terminal and one production per character, the symbols are a single
+# character class, which is treated as one terminal by the analysis and the parser
 startSymbol = "regex"
-nonTerminals = {"regex", "concat", "rep", "atom", "A1", "A2", "A3", "symbol"}
-characters = set(CharacterRange('a', 'z')) | set(CharacterRange('A', 'Z')) | set(CharacterRange('0', '9'))
+nonTerminals = {"regex", "concat", "rep", "atom", "A1", "A2", "A3"}
 # the empty string is represented by "_"
-symbols = {"_"} | characters
+symbols = CharacterClass("a-zA-Z0-9_")
 metaCharacters = {"|", "(", ")", "*", "?", "+"}
-terminals = symbols | metaCharacters
+terminals = {symbols} | metaCharacters
 productions = {
     "regex": [["concat", "A1"]],
     "A1": [["|" ,"regex"], []],
@@ -49,8 +46,7 @@ productions = {
     "A2": [["concat"], []],
     "rep": [["atom" ,"A3"]],
     "A3": [["*"], ["?"], ["+"], []],
-    "atom": [["(", "regex", ")"], ["symbol"]],
-    "symbol" : [[symbol] for symbol in symbols]
+    "atom": [["(", "regex", ")"], [symbols]],
 } 
 
 regexGrammar = Grammar(startSymbol=startSymbol, terminals=terminals, nonTerminals=nonTerminals, productions=productions) 
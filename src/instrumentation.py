@@ -0,0 +1,91 @@
+import time
+from collections import defaultdict
+
+# interface of the hooks which receive measurements from Grammar, LL1Parser and the engines of
+# LL1Parser. A hook is passed as instrumentation=... and only overrides the methods it is
+# interested in. Without a hook, the engines run uninstrumented and nothing is counted
+class Instrumentation:
+
+    # called once per phase of the analysis of a grammar or the construction of a parser
+    def phase(self, name, seconds):
+        pass
+
+    # called once per parse with its ParseStatistics, as soon as the input is accepted or rejected.
+    # Every parse of an LL1Parser in this process is reported: parse, parseFast, parseIds,
+    # parseFile, parseAsync, parseTree, parseWithRecovery, serial parseMany and the streams of
+    # LL1Parser.stream. Parses in the worker processes of parseMany are not reported, nor those of
+    # a ParseResultCache which are answered from the cache
+    def parse(self, statistics):
+        pass
+
+
+# step counters of a single parse. The maximal stack depth is the number of frames of the
+# production stack, which does not grow on right recursion in the streaming engine. The engine is
+# "items", "stream", "dfa", "tree" or "recovery", only "items" and "stream" count their steps,
+# the others report the outcome and the number of tokens only
+class ParseStatistics:
+    __slots__ = ("engine", "accepted", "tokens", "expansions", "shifts", "reductions", "maxStackDepth")
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.accepted = None
+        self.tokens = 0
+        self.expansions = 0
+        self.shifts = 0
+        self.reductions = 0
+        self.maxStackDepth = 1
+
+    def asDict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"ParseStatistics({', '.join(f'{name}={value!r}' for name, value in self.asDict().items())})"
+
+
+# hook which aggregates all measurements in memory, e.g. to be exported periodically to a
+# monitoring system through snapshot
+class MetricsCollector(Instrumentation):
+
+    counters = ("tokens", "expansions", "shifts", "reductions")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.phaseTimings = defaultdict(list)
+        self.parses = 0
+        self.accepted = 0
+        self.totals = dict.fromkeys(self.counters, 0)
+        self.maxStackDepth = 0
+
+    def phase(self, name, seconds):
+        self.phaseTimings[name].append(seconds)
+
+    def parse(self, statistics):
+        self.parses += 1
+        self.accepted += bool(statistics.accepted)
+        for counter in self.counters:
+            self.totals[counter] += getattr(statistics, counter)
+        self.maxStackDepth = max(self.maxStackDepth, statistics.maxStackDepth)
+
+    # plain values only, such that the snapshot can be serialised directly
+    def snapshot(self):
+        return {
+            "phases": {name: {"count": len(timings), "seconds": sum(timings), "maxSeconds": max(timings)} for name, timings in self.phaseTimings.items()},
+            "parses": self.parses,
+            "accepted": self.accepted,
+            "rejected": self.parses - self.accepted,
+            **self.totals,
+            "maxStackDepth": self.maxStackDepth,
+        }
+
+
+# runs a phase, records its wall time in timings and reports it to the hook
+def timedPhase(name, function, timings, instrumentation=None):
+    start = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start
+    timings[name] = timings.get(name, 0) + seconds
+    if instrumentation is not None:
+        instrumentation.phase(name, seconds)
+    return result
@@ -0,0 +1,348 @@
+from array import array
+from bisect import bisect_right
+
+# largest unicode code point
+maxCode = 0x10FFFF
+
+# generates a table driven lexer from token definitions. Every definition is a pair of a token
+# name and a regular expression; if several definitions match the longest possible prefix of
+# the input, the one given first wins. The expressions support literals, escapes, ".", character
+# classes like [a-zA-Z_] or [^0-9], grouping and the operators |, *, + and ?.
+#
+# The expressions are compiled into a single minimal DFA, whose transitions are stored in a
+# flat array with one row per state and one column per character class. Character classes are
+# the coarsest partition of the unicode code points which the expressions cannot distinguish,
+# such that the table does not grow with the size of the alphabet
+class Lexer:
+
+    def __init__(self, definitions, ignore=()):
+        self.names = [name for name, _ in definitions]
+        self.tokenIds = {name:i for i, name in enumerate(self.names)}
+        # tokens which are scanned but not reported, e.g. whitespace
+        self.ignored = {self.tokenIds[name] for name in ignore}
+
+        expressions = [RegularExpressionParser(pattern).parse() for _, pattern in definitions]
+        self.computeCharacterClasses(expressions)
+
+        nfa = NFA()
+        for token, expression in enumerate(expressions):
+            start, end = nfa.build(expression, self.characterClassesOf)
+            nfa.edges[nfa.start].append((None, start))
+            nfa.accepting[end] = token
+
+        self.computeDFA(nfa)
+        self.minimize()
+
+        if self.accepting[0] >= 0:
+            raise ValueError(f"Token {self.names[self.accepting[0]]} matches the empty word")
+
+    # every bound starts a new character class, code points below 256 are looked up in a table
+    def computeCharacterClasses(self, expressions):
+        bounds = {0}
+        for intervals in characterSets(expressions):
+            for low, high in intervals:
+                bounds.add(low)
+                bounds.add(high + 1)
+        self.bounds = sorted(bound for bound in bounds if bound <= maxCode)
+        self.numberOfClasses = len(self.bounds)
+        self.byteClasses = array("i", [self.characterClass(code) for code in range(256)])
+
+    def characterClass(self, code):
+        return bisect_right(self.bounds, code) - 1
+
+    def characterClassesOf(self, intervals):
+        classes = set()
+        for low, high in intervals:
+            classes.update(range(self.characterClass(low), self.characterClass(high) + 1))
+        return frozenset(classes)
+
+    # subset construction, states of the DFA are the epsilon closed sets of NFA states
+    def computeDFA(self, nfa):
+        startStates = nfa.closure({nfa.start})
+        stateIds = {startStates: 0}
+        worklist = [startStates]
+        transitions = []
+        self.accepting = []
+
+        # states are numbered in the order they are discovered, so the worklist is processed in order
+        for states in worklist:
+            row = [-1] * self.numberOfClasses
+            successors = [set() for _ in range(self.numberOfClasses)]
+            for state in states:
+                for classes, target in nfa.edges[state]:
+                    if classes is not None:
+                        for characterClass in classes:
+                            successors[characterClass].add(target)
+
+            for characterClass, targets in enumerate(successors):
+                if targets:
+                    targets = nfa.closure(targets)
+                    if targets not in stateIds:
+                        stateIds[targets] = len(stateIds)
+                        worklist.append(targets)
+                    row[characterClass] = stateIds[targets]
+
+            transitions.append(row)
+            # the definition given first wins
+            tokens = [nfa.accepting[state] for state in states if state in nfa.accepting]
+            self.accepting.append(min(tokens) if tokens else -1)
+
+        self.transitionRows = transitions
+
+    # Moore's partition refinement, states are distinguished by their token and the blocks
+    # of their successors until the partition is stable
+    def minimize(self):
+        numberOfStates = len(self.transitionRows)
+        block = list(self.accepting)
+        numberOfBlocks = None
+        while True:
+            signatures = dict()
+            newBlock = []
+            for state in range(numberOfStates):
+                signature = (block[state], tuple(block[target] if target >= 0 else None for target in self.transitionRows[state]))
+                newBlock.append(signatures.setdefault(signature, len(signatures)))
+            block = newBlock
+            if len(signatures) == numberOfBlocks:
+                break
+            numberOfBlocks = len(signatures)
+
+        # the block of the start state gets the id 0
+        order = {block[0]: 0}
+        for state in range(numberOfStates):
+            order.setdefault(block[state], len(order))
+
+        self.numberOfStates = numberOfBlocks
+        self.transitions = array("i", [-1]) * (numberOfBlocks * self.numberOfClasses)
+        accepting = array("i", [-1]) * numberOfBlocks
+        for state in range(numberOfStates):
+            row = order[block[state]] * self.numberOfClasses
+            accepting[order[block[state]]] = self.accepting[state]
+            for characterClass, target in enumerate(self.transitionRows[state]):
+                if target >= 0:
+                    self.transitions[row + characterClass] = order[block[target]]
+        self.accepting = accepting
+        del self.transitionRows
+
+    # yields (tokenId, start, end) for every token of a str, bytes or memoryview, where the
+    # token spans the half open interval [start, end) of the input. No substrings are created
+    def scan(self, text):
+        isString = isinstance(text, str)
+        transitions = self.transitions
+        accepting = self.accepting
+        byteClasses = self.byteClasses
+        numberOfClasses = self.numberOfClasses
+        ignored = self.ignored
+        length = len(text)
+
+        position = 0
+        while position < length:
+            state = 0
+            token = -1
+            end = position
+            index = position
+            # maximal munch: continue as long as there is a transition and remember the last
+            # accepting state
+            while index < length:
+                code = ord(text[index]) if isString else text[index]
+                state = transitions[state * numberOfClasses + (byteClasses[code] if code < 256 else self.characterClass(code))]
+                if state < 0:
+                    break
+                index += 1
+                if accepting[state] >= 0:
+                    token = accepting[state]
+                    end = index
+
+            if token < 0:
+                raise RuntimeError(f"Unexpected character {chr(text[position]) if not isString else text[position]!r} at position {position}")
+            if token not in ignored:
+                yield (token, position, end)
+            position = end
+
+    # token names of the input, which can be parsed by an LL1Parser whose terminals are the names
+    def tokens(self, text):
+        names = self.names
+        for token, _, _ in self.scan(text):
+            yield names[token]
+
+    # terminal ids of the given parser for the tokens of the input, which can be fed to
+    # StreamingParser.feedIds or LL1Parser.parseIds without any lookup by name
+    def terminalIds(self, text, parser):
+        translation = array("i", [parser.terminalIds.get(name, -1) for name in self.names])
+        for token, start, _ in self.scan(text):
+            terminal = translation[token]
+            if terminal < 0:
+                raise RuntimeError(f"Unknown token: {self.names[token]} at position {start}")
+            yield terminal
+
+
+class NFA:
+
+    def __init__(self):
+        # an edge is a pair of a set of character classes, or None for an epsilon edge, and a target
+        self.edges = [[]]
+        self.start = 0
+        self.accepting = dict()
+
+    def newState(self):
+        self.edges.append([])
+        return len(self.edges) - 1
+
+    # Thompson's construction, returns the start and end state of the automaton of the expression
+    def build(self, expression, characterClassesOf):
+        start, end = self.newState(), self.newState()
+        match expression:
+            case ("set", intervals):
+                self.edges[start].append((characterClassesOf(intervals), end))
+            case ("concat", expressions):
+                current = start
+                for subexpression in expressions:
+                    subStart, subEnd = self.build(subexpression, characterClassesOf)
+                    self.edges[current].append((None, subStart))
+                    current = subEnd
+                self.edges[current].append((None, end))
+            case ("alt", expressions):
+                for subexpression in expressions:
+                    subStart, subEnd = self.build(subexpression, characterClassesOf)
+                    self.edges[start].append((None, subStart))
+                    self.edges[subEnd].append((None, end))
+            case (operator, subexpression):
+                subStart, subEnd = self.build(subexpression, characterClassesOf)
+                self.edges[start].append((None, subStart))
+                self.edges[subEnd].append((None, end))
+                if operator in ("star", "opt"):
+                    self.edges[start].append((None, end))
+                if operator in ("star", "plus"):
+                    self.edges[subEnd].append((None, subStart))
+        return start, end
+
+    def closure(self, states):
+        closure = set(states)
+        worklist = list(states)
+        while worklist:
+            for classes, target in self.edges[worklist.pop()]:
+                if classes is None and target not in closure:
+                    closure.add(target)
+                    worklist.append(target)
+        return frozenset(closure)
+
+
+def characterSets(expressions):
+    for expression in expressions:
+        match expression:
+            case ("set", intervals):
+                yield intervals
+            case ("concat" | "alt", subexpressions):
+                yield from characterSets(subexpressions)
+            case (_, subexpression):
+                yield from characterSets([subexpression])
+
+
+# recursive descent parser for the regular expressions of token definitions. An expression is
+# represented as a tuple ("set", intervals), ("concat", expressions), ("alt", expressions) or
+# (operator, expression) for the operators "star", "plus" and "opt"
+class RegularExpressionParser:
+
+    escapes = {
+        "n": [(ord("\n"), ord("\n"))],
+        "t": [(ord("\t"), ord("\t"))],
+        "r": [(ord("\r"), ord("\r"))],
+        "d": [(ord("0"), ord("9"))],
+        "w": [(ord("a"), ord("z")), (ord("A"), ord("Z")), (ord("0"), ord("9")), (ord("_"), ord("_"))],
+        "s": [(ord(" "), ord(" ")), (ord("\t"), ord("\r"))],
+    }
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.position = 0
+
+    def parse(self):
+        expression = self.alternation()
+        if self.position < len(self.pattern):
+            self.fail("Unexpected ')'")
+        return expression
+
+    def fail(self, reason):
+        raise ValueError(f"{reason} at position {self.position} of pattern {self.pattern!r}")
+
+    def peek(self):
+        return self.pattern[self.position] if self.position < len(self.pattern) else None
+
+    def next(self):
+        if self.position >= len(self.pattern):
+            self.fail("Unexpected end of pattern")
+        self.position += 1
+        return self.pattern[self.position - 1]
+
+    def alternation(self):
+        alternatives = [self.concatenation()]
+        while self.peek() == "|":
+            self.next()
+            alternatives.append(self.concatenation())
+        return alternatives[0] if len(alternatives) == 1 else ("alt", alternatives)
+
+    def concatenation(self):
+        expressions = []
+        while self.peek() not in (None, "|", ")"):
+            expressions.append(self.repetition())
+        return expressions[0] if len(expressions) == 1 else ("concat", expressions)
+
+    def repetition(self):
+        expression = self.atom()
+        while self.peek() in ("*", "+", "?"):
+            expression = ({"*": "star", "+": "plus", "?": "opt"}[self.next()], expression)
+        return expression
+
+    def atom(self):
+        character = self.next()
+        match character:
+            case "(":
+                expression = self.alternation()
+                if self.peek() != ")":
+                    self.fail("Missing ')'")
+                self.next()
+                return expression
+            case "[":
+                return ("set", self.characterClass())
+            case ".":
+                return ("set", [(0, maxCode)])
+            case "\\":
+                return ("set", self.escape())
+            case "*" | "+" | "?" | ")":
+                self.fail(f"Unexpected '{character}'")
+        return ("set", [(ord(character), ord(character))])
+
+    def escape(self):
+        character = self.next()
+        return self.escapes.get(character, [(ord(character), ord(character))])
+
+    def characterClass(self):
+        negated = self.peek() == "^"
+        if negated:
+            self.next()
+
+        intervals = []
+        while self.peek() != "]":
+            character = self.next()
+            if character == "\\":
+                intervals += self.escape()
+                continue
+            low = high = ord(character)
+            if self.peek() == "-" and self.position + 1 < len(self.pattern) and self.pattern[self.position + 1] != "]":
+                self.next()
+                high = ord(self.next())
+                if high < low:
+                    self.fail("Invalid range")
+            intervals.append((low, high))
+        self.next()
+
+        if not negated:
+            return intervals
+        complement = []
+        low = 0
+        for start, end in sorted(intervals):
+            if start > low:
+                complement.append((low, start - 1))
+            low = max(low, end + 1)
+        if low <= maxCode:
+            complement.append((low, maxCode))
+        return complement
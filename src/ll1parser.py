@@ -1,43 +1,413 @@
+import asyncio
+import mmap
+import multiprocessing
+import os
+import re
 import unicode
-from collections import defaultdict
-from contextfreegrammar import concat1, Sequence
+from array import array
+from bisect import bisect_right
+from itertools import chain
+from contextfreegrammar import concat1, CharacterClass, Sequence
+from instrumentation import ParseStatistics, timedPhase
+from parsetree import ParseTree
+from tarjan import StronglyConnectedComponents
 
 class LL1Parser:
 
-    def __init__(self, grammar):
+    # transitions of the DFAs of compileRegularSubsets which do not lead to a state
+    errorTransition = -1
+    exitTransition = -2
+
+    def __init__(self, grammar, instrumentation=None):
         self.grammar = grammar
 
         if not self.grammar.isLL1():
             raise ValueError("Grammar is not LL(1)")
 
-        self.computeLookaheadTable()
+        # the hook of the grammar is used unless another one is given. Only with a hook the
+        # engines count their steps, see InstrumentedStreamingParser
+        self.instrumentation = instrumentation if instrumentation is not None else grammar.instrumentation
+        self.phaseTimings = dict()
+        # computed on demand by followIds
+        self.follow1Ids = None
+        # only set by compileRegularSubsets
+        self.dfaTable = None
+        # set by ParserRegistry, whose parsers must not be edited by update or compileRegularSubsets
+        self.shared = False
+        # the edits of the grammar the tables reflect, see update
+        self.grammarEdits = (grammar.editedProductions, len(grammar.editedProductions))
+
+        # a grammar restored from an analysis cache also shares the cached lookahead table
+        cache = self.grammar.cache if self.grammar.cacheKey is not None else None
+        if cache is None or not self.timedPhase("cacheLoad", lambda: cache.loadLookaheadTable(self)):
+            self.timedPhase("lookaheadTable", self.computeLookaheadTable)
+            if cache is not None:
+                self.timedPhase("cacheStore", lambda: cache.storeLookaheadTable(self))
+
+        self.timedPhase("productionCodes", self.computeProductionCodes)
+
+    def timedPhase(self, name, function):
+        return timedPhase(name, function, self.phaseTimings, self.instrumentation)
 
     def computeLookaheadTable(self):
-        self.lookaheadTable = defaultdict(list)
+        # the lookahead table is a dense array with one row per nonterminal id and one column per
+        # terminal id (plus the end of input), holding the id of the production to expand or -1
+        self.width = self.grammar.endOfInputId + 1
+        self.lookaheadTable = array("i", [-1]) * (len(self.grammar.nonTerminalList) * self.width)
 
         # fill in lookahead table, such that every production alternative can be
         # deterministicly chosen, given the next lookahead symbol.
         # If the given grammar is LL(1), deteminism is guaranteed
-        for (A, rightHandSide) in self.grammar.productions():
-            lookaheadSymbols = concat1(self.grammar.first1(rightHandSide), self.grammar.follow1Set[A])
-            for lookaheadSymbol in lookaheadSymbols:
-                self.lookaheadTable[(A, lookaheadSymbol)].append(rightHandSide)
+        for production, (A, rightHandSide) in enumerate(self.grammar.productionList):
+            row = self.grammar.nonTerminalIds[A] * self.width
+            for terminal in self.lookaheadIds(production):
+                cell = row + terminal
+                # sanity check: non deterministic choices as a result of the grammar not beeing LL(1)
+                if self.lookaheadTable[cell] not in (-1, production):
+                    exit(f"Lookahead table is ambiguous: {[self.grammar.productionList[self.lookaheadTable[cell]], (A, rightHandSide)]}")
+                self.lookaheadTable[cell] = production
+
+    # brings the tables up to date after the grammar was edited, given the nonterminals returned
+    # by Grammar.addProduction or Grammar.removeProduction. Only the rows of these nonterminals and
+    # of productions whose id changed are filled again. Without the changed nonterminals, the
+    # tables are computed from scratch
+    def update(self, changedNonTerminals=None):
+        self.checkEditable()
+        if not self.grammar.isLL1():
+            raise ValueError("Grammar is not LL(1)")
+
+        # a grammar which was analysed again since the last update starts a new list of edits
+        editedProductions, appliedEdits = self.grammarEdits
+        if changedNonTerminals is None or editedProductions is not self.grammar.editedProductions or self.width != self.grammar.endOfInputId + 1 or len(self.lookaheadTable) != len(self.grammar.nonTerminalList) * self.width:
+            self.timedPhase("lookaheadTable", self.computeLookaheadTable)
+            self.timedPhase("productionCodes", self.computeProductionCodes)
+        else:
+            self.timedPhase("patchTables", lambda: self.patchTables(changedNonTerminals, editedProductions[appliedEdits:]))
+        self.grammarEdits = (self.grammar.editedProductions, len(self.grammar.editedProductions))
+        self.follow1Ids = None
+        # the DFAs have to be compiled again for the edited grammar
+        self.dfaTable = None
+
+    # refills the rows of the changed nonterminals and of the edited productions, given their ids
+    # as recorded by Grammar.editedProductions. Production ids beyond the end of the production
+    # list belonged to removed productions
+    def patchTables(self, changedNonTerminals, editedProductions):
+        productionList = self.grammar.productionList
+        changedProductions = sorted({production for production in editedProductions if production < len(productionList)})
+
+        changedRows = set(changedNonTerminals) | {productionList[production][0] for production in changedProductions}
+        for A in changedRows:
+            row = self.grammar.nonTerminalIds[A] * self.width
+            self.lookaheadTable[row:row + self.width] = array("i", [-1]) * self.width
+            for rightHandSide in self.grammar.delta[A]:
+                production = self.grammar.productionIds[(A, rightHandSide)]
+                for terminal in self.lookaheadIds(production):
+                    self.lookaheadTable[row + terminal] = production
+
+        # the augmented start production keeps being the last one. Added productions have the
+        # highest ids, hence they are appended in order
+        startRule = self.rules.pop()
+        startCode = self.productionCodes.pop()
+        del self.rules[len(productionList):]
+        del self.productionCodes[len(productionList):]
+        for production in changedProductions:
+            code = tuple(self.encode(symbol) for symbol in productionList[production][1])
+            if production < len(self.rules):
+                self.rules[production] = productionList[production]
+                self.productionCodes[production] = code
+            else:
+                self.rules.append(productionList[production])
+                self.productionCodes.append(code)
+        self.rules.append(startRule)
+        self.productionCodes.append(startCode)
+        self.startProduction = len(self.rules) - 1
+
+    def checkEditable(self):
+        if self.shared:
+            raise RuntimeError("Cannot edit a parser which is shared by a ParserRegistry")
+
+    # compiles the regular nonterminals of the grammar, see Grammar.regularNonTerminals, into DFAs
+    # which the fast engine runs with a single table lookup per token instead of expanding,
+    # shifting and reducing productions. Only the outermost regular nonterminals are compiled, as
+    # the DFA of a nonterminal includes those it refers to. If the start symbol is regular, the
+    # whole input is recognised by one DFA in constant memory. Nonterminals with more than
+    # maxStates states are not compiled. Returns the compiled nonterminals
+    def compileRegularSubsets(self, maxStates=1024):
+        self.checkEditable()
+        regularNonTerminals = self.grammar.regularNonTerminals()
+        transitions = dict()
+        stateSets = self.timedPhase("exploreDFAs", lambda: self.exploreDFAs(regularNonTerminals, transitions, maxStates))
+        # all DFAs share one table with a row of transitions per state, the transitions hold the
+        # offset of the row of the next state
+        self.dfaTable = array("i")
+        self.dfaNonTerminals = []
+        startStates = dict()
+
+        visited = set()
+        worklist = [self.grammar.startSymbol]
+        while worklist:
+            A = worklist.pop()
+            if A in visited:
+                continue
+            visited.add(A)
+            if A in regularNonTerminals and stateSets[self.dfaStartState(A)] is not None:
+                # the start state is the first state of a DFA
+                startStates[A] = len(self.dfaTable)
+                self.timedPhase("compileDFA", lambda: self.compileDFA(A, transitions))
+                continue
+            worklist += [B for rightHandSide in self.grammar.delta[A] for B in rightHandSide if B in self.grammar.nonTerminals]
+
+        # the codes of the DFA engine refer to a compiled nonterminal by dfaBase plus the offset of
+        # the row of its start state, the production id dfaFrame marks a frame running a DFA
+        self.dfaBase = len(self.lookaheadTable)
+        self.dfaFrame = len(self.rules)
+        startCodes = {self.encode(A):self.dfaBase + startState for A, startState in startStates.items()}
+        self.dfaProductionCodes = [tuple(startCodes.get(symbol, symbol) for symbol in rightHandSide) for rightHandSide in self.productionCodes]
+        return set(startStates)
+
+    # the states of the fast engine while parsing A are its stacks after shifting a token, see
+    # dfaStep. The stack of a regular nonterminal has a bounded depth, as nonterminals of its own
+    # component only occur at the end of alternatives and replace the frame of their production,
+    # hence there are finitely many states. Since the engine decides by the lookahead alone, the
+    # states do not depend on the context of A, such that DFAs share the states of the
+    # nonterminals they refer to at the end. Maps the start state of every regular nonterminal to
+    # the set of states of its DFA, or to None if it has more than maxStates states. The
+    # transitions of every explored state are kept in transitions
+    def exploreDFAs(self, regularNonTerminals, transitions, maxStates):
+        referenceGraph = {A:{B for rightHandSide in self.grammar.delta[A] for B in rightHandSide if B in regularNonTerminals} for A in regularNonTerminals}
+        stateSets = dict()
+
+        # Tarjans algorithm finds a component after all components it refers to. The DFA of A
+        # runs the DFA of every nonterminal A refers to in some context, hence it has at least as
+        # many states. Reaching the start state of an explored nonterminal adds its states as a
+        # whole, such that nested DFAs are only explored once
+        for component in StronglyConnectedComponents(referenceGraph):
+            for A in component:
+                startState = self.dfaStartState(A)
+                if any(stateSets.get(self.dfaStartState(B), ()) is None for B in referenceGraph[A]):
+                    stateSets[startState] = None
+                    continue
+
+                states = {startState}
+                worklist = [startState]
+                while worklist and states is not None:
+                    state = worklist.pop()
+                    if state not in transitions:
+                        transitions[state] = tuple(self.dfaStep(state, lookahead) for lookahead in range(self.width))
+                    for target in transitions[state]:
+                        if not target or target in states:
+                            continue
+                        if target in stateSets:
+                            if stateSets[target] is None:
+                                states = None
+                                break
+                            states |= stateSets[target]
+                        else:
+                            states.add(target)
+                            worklist.append(target)
+                        if len(states) > maxStates:
+                            states = None
+                            break
+                stateSets[startState] = frozenset(states) if states is not None else None
+        return stateSets
+
+    # writes the rows of the DFA of A, whose states were explored by exploreDFAs, to dfaTable
+    def compileDFA(self, A, transitions):
+        startState = self.dfaStartState(A)
+        stateIds = {startState: 0}
+        worklist = [startState]
+        offset = len(self.dfaTable)
+
+        for state in worklist:
+            for target in transitions[state]:
+                if target is None:
+                    self.dfaTable.append(self.errorTransition)
+                elif target == ():
+                    self.dfaTable.append(self.exitTransition)
+                else:
+                    if target not in stateIds:
+                        stateIds[target] = len(stateIds)
+                        worklist.append(target)
+                    self.dfaTable.append(offset + stateIds[target] * self.width)
+        self.dfaNonTerminals += [A] * len(worklist)
+
+    # the start state of the DFA of A holds the frame of a pseudo production with the right hand
+    # side A, whose negative id -1 - encode(A) identifies A
+    def dfaStartState(self, A):
+        return ((-1 - self.encode(A), 0),)
+
+    # the stack after shifting the lookahead from the given stack of (production, marker) frames,
+    # () if the pseudo production is completed without consuming the lookahead, or None on a
+    # parsing error. A single frame in front of the last symbol B of its production is replaced
+    # once B is expanded, hence it is the start state of B
+    def dfaStep(self, state, lookahead):
+        frames = list(state)
+        while frames:
+            production, marker = frames[-1]
+            rightHandSide = (-1 - production,) if production < 0 else self.productionCodes[production]
+            if marker == len(rightHandSide):
+                frames.pop()
+                if frames:
+                    production, marker = frames[-1]
+                    frames[-1] = (production, marker + 1)
+                continue
+
+            symbol = rightHandSide[marker]
+            if symbol >= 0:
+                expansion = self.lookaheadTable[symbol + lookahead]
+                if expansion < 0:
+                    return None
+                if marker + 1 == len(rightHandSide):
+                    frames[-1] = (expansion, 0)
+                else:
+                    frames.append((expansion, 0))
+            elif ~symbol == lookahead:
+                frames[-1] = (production, marker + 1)
+                if len(frames) == 1 and marker + 2 == len(rightHandSide) and rightHandSide[-1] >= 0:
+                    return ((-1 - rightHandSide[-1], 0),)
+                return tuple(frames)
+            else:
+                return None
+        return ()
+
+    # the ids of the lookahead symbols selecting a production, First1(rhs) concatenated with Follow1(A)
+    def lookaheadIds(self, production):
+        bitsetAnalysis = self.grammar.bitsetAnalysis
+        if bitsetAnalysis is not None:
+            return bitsetAnalysis.terminalIds(bitsetAnalysis.lookahead1Bits[production])
+        A, rightHandSide = self.grammar.productionList[production]
+        return map(self.terminalId, concat1(self.grammar.first1(rightHandSide), self.grammar.follow1Set[A]))
+
+    def computeProductionCodes(self):
+        # the fast engine refers to productions by their id, the augmented start production
+        # S' -> S $ gets the id following the productions of the grammar. Right hand sides are
+        # encoded as integers: a nonterminal by the offset of its row in the lookahead table and
+        # a terminal t by ~t, where $ is encoded as the end of input
+        self.rules = self.grammar.productionList + [("S'", Sequence([self.grammar.startSymbol, "$"]))]
+        self.startProduction = len(self.rules) - 1
+        self.productionCodes = [tuple(self.encode(symbol) for symbol in rightHandSide) for (_, rightHandSide) in self.rules]
+
+        # the fast engine only needs these tables, which do not refer to the grammar any more
+        self.terminalIds = self.grammar.terminalIds
+        self.terminalList = self.grammar.terminalList
+        self.endOfInputId = self.grammar.endOfInputId
+        self.computeTokenLookup()
+
+    # tokens which are not terminals themselves are looked up in the character classes: code
+    # points below 256 through a table, all others by a binary search over the intervals
+    def computeTokenLookup(self):
+        self.byteClassIds = array("i", [-1]) * 256
+        intervals = []
+        for terminal, a in enumerate(self.terminalList):
+            if isinstance(a, CharacterClass):
+                for code in range(256):
+                    if a.containsCode(code):
+                        self.byteClassIds[code] = terminal
+                intervals += [(low, high, terminal) for low, high in a.intervals if high >= 256]
+        self.classIntervals = sorted(intervals)
+        self.classLows = [low for low, _, _ in self.classIntervals]
+
+        # the terminal of every byte when parsing binary input, where a byte is read as the
+        # character with the same code point
+        self.byteTerminalIds = [self.terminalIds.get(chr(code), self.byteClassIds[code]) for code in range(256)]
+        unknownBytes = bytes(code for code in range(256) if self.byteTerminalIds[code] < 0)
+        self.unknownBytePattern = re.compile(b"[" + re.escape(unknownBytes) + b"]") if unknownBytes else None
+
+    # the id of the character class matching a token which is not a terminal itself, or None
+    def classifyToken(self, token):
+        if not isinstance(token, str) or len(token) != 1:
+            return None
+        code = ord(token)
+        if code < 256:
+            terminal = self.byteClassIds[code]
+            return terminal if terminal >= 0 else None
+        index = bisect_right(self.classLows, code) - 1
+        if index >= 0 and code <= self.classIntervals[index][1]:
+            return self.classIntervals[index][2]
+        return None
+
+    # the tables of the fast engine as builtin objects, which are cheap to serialize and suffice
+    # to parse with a parser created by fromTables, e.g. in another process
+    def exportTables(self):
+        rules = [(A, tuple(rightHandSide)) for A, rightHandSide in self.rules]
+        return (self.terminalList, self.width, self.lookaheadTable, rules, self.productionCodes)
+
+    @staticmethod
+    def fromTables(tables, instrumentation=None):
+        parser = LL1Parser.__new__(LL1Parser)
+        parser.grammar = None
+        parser.instrumentation = instrumentation
+        parser.phaseTimings = dict()
+        parser.follow1Ids = None
+        parser.dfaTable = None
+        parser.shared = False
+        parser.terminalList, parser.width, parser.lookaheadTable, rules, parser.productionCodes = tables
+        parser.rules = [(A, Sequence(rightHandSide)) for A, rightHandSide in rules]
+        parser.startProduction = len(parser.rules) - 1
+        parser.terminalIds = {a:i for i, a in enumerate(parser.terminalList)}
+        parser.endOfInputId = len(parser.terminalList)
+        parser.computeTokenLookup()
+        return parser
+
+    # Follow1(A) as terminal ids for the row offset of every nonterminal A, the tokens on which
+    # the error recovery of RecoveringParser synchronises
+    def followIds(self):
+        if self.follow1Ids is None:
+            if self.grammar is None:
+                raise RuntimeError("Error recovery requires the grammar of the parser")
+            self.follow1Ids = {self.grammar.nonTerminalIds[A] * self.width: frozenset(map(self.terminalId, self.grammar.follow1Set[A])) for A in self.grammar.nonTerminalList}
+        return self.follow1Ids
+
+    def terminalId(self, terminal):
+        return self.grammar.endOfInputId if terminal in (None, "$") else self.grammar.terminalIds[terminal]
+
+    def encode(self, symbol):
+        if symbol in self.grammar.nonTerminalIds:
+            return self.grammar.nonTerminalIds[symbol] * self.width
+        return ~self.terminalId(symbol)
+
+    # returns the right hand side to expand the given nonterminal with, or None if there is none
+    def expansion(self, nonTerminal, lookahead):
+        production = self.lookaheadTable[self.grammar.nonTerminalIds[nonTerminal] * self.width + self.terminalId(lookahead)]
+        return self.grammar.productionList[production][1] if production >= 0 else None
 
     def lookahead(self, tokens):
         try:
             lookahead = next(tokens)
             if lookahead not in self.grammar.terminals:
-                raise RuntimeError(f"Unknown token: {lookahead}")
+                # the terminal of a token matching a character class is the class itself
+                terminal = self.classifyToken(lookahead)
+                if terminal is None:
+                    raise RuntimeError(f"Unknown token: {lookahead}")
+                return self.terminalList[terminal]
             return lookahead
         except StopIteration:
             return None
 
-    def parse(self, tokens, actions=None, printErrorMessages=False, printStack=False):
+    def terminalName(self, terminal):
+        return 'EOF' if terminal == self.endOfInputId else self.terminalList[terminal]
+
+    def parse(self, tokens, actions=None, printErrorMessages=False, printStack=False, fast=False):
+
+        if actions is not None:
+            return self.parseTree(tokens, actions=actions, printErrorMessages=printErrorMessages, printStack=printStack) is not None
+
+        if fast:
+            return self.parseFast(tokens, printErrorMessages=printErrorMessages, printStack=printStack)
 
         errorMessage = ErrorMessage()
         if printErrorMessages:
             errorMessage.activate()
-    
+
+        statistics = ParseStatistics("items")
+        accepted = self.parseItems(tokens, errorMessage, printStack, statistics)
+        if self.instrumentation is not None:
+            statistics.accepted = accepted
+            self.instrumentation.parse(statistics)
+        return accepted
+
+    # the item based engine of parse, which counts its steps in statistics
+    def parseItems(self, tokens, errorMessage, printStack, statistics):
         stack = [Item("S'", [self.grammar.startSymbol, "$"])]
         lookahead = self.lookahead(tokens)
         
@@ -50,33 +420,659 @@ class LL1Parser:
                 #expand: apply expansion rule given the next lookahead symbol
                 case [*rest, top] if not top.isComplete() and top.markedSymbol() in self.grammar.nonTerminals:
                     nonTerminal = top.markedSymbol()
-                    expansions = self.lookaheadTable[(nonTerminal, lookahead)]
-                    match expansions:
-                        # single deterministic choice
-                        case [expansion]:
-                            stack.append(Item(nonTerminal, expansion))
-                        # parse error: no rule to apply, the word is rejected
-                        case []:
-                            errorMessage.show(f"Parsing error: Cannot expand {top} for lookahead: \'{'EOF' if lookahead == None else lookahead}\'")
-                            return False
-                        # sanity check: non deterministic choices as a result of the grammar not beeing LL(1)
-                        case [*rules]:
-                            exit(f"Lookahead table is ambiguous: {rules}")
+                    expansion = self.expansion(nonTerminal, lookahead)
+                    # parse error: no rule to apply, the word is rejected
+                    if expansion is None:
+                        errorMessage.show(f"Parsing error: Cannot expand {top} for lookahead: \'{'EOF' if lookahead == None else lookahead}\'")
+                        return False
+                    # single deterministic choice, guaranteed by the construction of the lookahead table
+                    stack.append(Item(nonTerminal, expansion))
+                    statistics.expansions += 1
+                    statistics.maxStackDepth = max(statistics.maxStackDepth, len(stack))
                     
                 #shift: terminal symbol is encountered, shift to the next lookahead symbol
                 case [*rest, top] if not top.isComplete() and top.markedSymbol() in self.grammar.terminals and top.markedSymbol() == lookahead:
                     stack[-1] = top.next()
                     lookahead = self.lookahead(tokens)
+                    statistics.shifts += 1
+                    statistics.tokens += 1
                 #reduce: an item was completed, pop the complete item and proceed with the next symbol of the item before
                 case [*rest, second, top] if top.isComplete() and second.markedSymbol() == top.leftHandSide:
-                    #TODO execute callbacks on successful reductions
+                    # semantic actions are executed on the reductions of parseTree
                     stack.pop()
                     stack[-1] = stack[-1].next()
+                    statistics.reductions += 1
                 
                 case _:
                     errorMessage.show(f"Parsing error: {top} could neither be expanded, shifted nor reduced for lookahead: \'{'EOF' if lookahead == None else lookahead}\'")
                     return False
 
+    # table driven variant of parse with the same accept/reject behaviour. Instead of items, the
+    # stack holds production ids and marker positions in two parallel lists which are updated
+    # in place, so no objects are allocated per step and the cost of a step does not depend on the
+    # depth of the stack
+    def parseFast(self, tokens, printErrorMessages=False, printStack=False):
+        stream = self.stream(printErrorMessages=printErrorMessages, printStack=printStack)
+        return stream.feed(tokens) is not False and stream.finish()
+
+    # parses every input of a batch with the fast engine and returns a list of (accepted,
+    # errorMessage) pairs in input order. With more than one worker, the inputs are distributed
+    # over a process pool in chunks. Where processes are forked, the workers inherit this parser,
+    # otherwise every worker receives the exported tables once instead of the grammar
+    def parseMany(self, inputs, workers=None, chunksize=256):
+        if workers == 1:
+            return [parseWithErrorMessage(self, tokens) for tokens in inputs]
+
+        # forked workers inherit the parser through the arguments of the initializer, spawned workers
+        # rebuild it from the pickled tables. The parser is never stored in a global of this
+        # process, hence concurrent calls from different threads do not interfere
+        if "fork" in multiprocessing.get_all_start_methods():
+            context, initializer, initargs = multiprocessing.get_context("fork"), setWorkerParser, (self,)
+        else:
+            context, initializer, initargs = multiprocessing.get_context("spawn"), initializeWorker, (self.exportTables(),)
+
+        with context.Pool(workers, initializer=initializer, initargs=initargs) as pool:
+            return list(pool.imap(parseInWorker, inputs, chunksize=chunksize))
+
+    # parses the bytes of a file with the fast engine, every byte being a token. The file is memory
+    # mapped and bytes are translated to terminal ids through a table, such that the file is neither
+    # read into memory nor decoded. Error positions are byte offsets
+    def parseFile(self, path, printErrorMessages=False):
+        stream = self.stream(printErrorMessages=printErrorMessages)
+        stream.unit = "byte"
+
+        with open(path, "rb") as file:
+            # empty files cannot be mapped
+            if os.fstat(file.fileno()).st_size == 0:
+                return stream.finish()
+
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if hasattr(data, "madvise"):
+                    data.madvise(mmap.MADV_SEQUENTIAL)
+                return stream.feedBytes(data) is not False and stream.finish()
+
+    # parses with error recovery and returns every ParsingError of the input in one pass, the list
+    # is empty if the input is accepted. Unlike parse, the input is always read to its end
+    def parseWithRecovery(self, tokens, printErrorMessages=False):
+        stream = RecoveringParser(self, printErrorMessages=printErrorMessages)
+        stream.feed(tokens)
+        stream.finish()
+        return stream.errors
+
+    # asynchronous variant of parseFast for tokens arriving from an async iterator of chunks or
+    # from an asyncio.StreamReader, see StreamingParser.feedAsync. Many inputs can be parsed
+    # concurrently on one event loop, each only waiting while it has no tokens
+    async def parseAsync(self, source, printErrorMessages=False, chunkSize=65536):
+        stream = self.stream(printErrorMessages=printErrorMessages)
+        return await stream.feedAsync(source, chunkSize=chunkSize) is not False and stream.finish()
+
+    # parses tokens given as terminal ids with the fast engine, e.g. the output of Lexer.terminalIds
+    def parseIds(self, terminalIds, printErrorMessages=False):
+        stream = self.stream(printErrorMessages=printErrorMessages)
+        return stream.feedIds(terminalIds) is not False and stream.finish()
+
+    # parses with the fast engine and returns the ParseTree of the input, or None if it is
+    # rejected. actions maps a nonterminal, or a production (A, rightHandSide) for a single
+    # alternative, to a callback which is called with the Node of every reduction of it. The
+    # children of a node are reduced before the node itself, a returned value is stored as the
+    # value of the node
+    def parseTree(self, tokens, actions=None, printErrorMessages=False, printStack=False):
+        stream = TreeBuildingParser(self, actions=actions, printErrorMessages=printErrorMessages, printStack=printStack)
+        if stream.feed(tokens) is not False and stream.finish():
+            return stream.tree
+        return None
+
+    # push based alternative to parse: tokens are fed in chunks as they arrive, see StreamingParser
+    # compiled DFAs are used with and without a hook, such that the hook measures the engine which
+    # also runs without it. Only the plain engine counts its steps
+    def stream(self, printErrorMessages=False, printStack=False):
+        if self.dfaTable is not None and not printStack:
+            engine = DFAStreamingParser
+        elif self.instrumentation is not None:
+            engine = InstrumentedStreamingParser
+        else:
+            engine = StreamingParser
+        return engine(self, printErrorMessages=printErrorMessages, printStack=printStack)
+
+
+# engine of LL1Parser.parseFast, which keeps its stack between calls of feed, such
+# that input arriving in chunks can be validated without buffering it. Its memory only depends
+# on the depth of the stack. A rejection is reported as soon as the offending token is fed,
+# acceptance can only be decided by finish
+class StreamingParser:
+
+    byteBlockSize = 1 << 20
+    # the name of the engine in its ParseStatistics
+    engine = "stream"
+
+    def __init__(self, parser, printErrorMessages=False, printStack=False):
+        self.parser = parser
+        self.printStack = printStack
+        self.errorMessage = ErrorMessage()
+        if printErrorMessages:
+            self.errorMessage.activate()
+
+        self.productionStack = [parser.startProduction]
+        self.markerStack = [0]
+        # number of tokens consumed so far
+        self.position = 0
+        # the unit of the position in error messages
+        self.unit = "token"
+        # None as long as it is undecided whether the input is accepted
+        self.result = None
+        # reported to the hook of the parser once the input is decided, see report
+        self.statistics = ParseStatistics(self.engine) if parser.instrumentation is not None else None
+
+    # consumes an iterable of tokens and returns False once the input is rejected, otherwise None
+    def feed(self, chunk):
+        return self.feedIds(self.terminalIds(chunk))
+
+    # like feed, for tokens which are already given as terminal ids, e.g. by Lexer.terminalIds
+    def feedIds(self, chunk):
+        if self.result is not None:
+            if self.result:
+                raise RuntimeError("Cannot feed a finished parser")
+            return False
+
+        for terminal in chunk:
+            if not self.consume(terminal):
+                self.result = False
+                self.report()
+                return False
+            self.position += 1
+        return None
+
+    # like feed for bytes, every byte being a token, which are translated to terminal ids through
+    # a table. The data is processed in blocks of byteBlockSize bytes: the first byte of a block
+    # which is no token is searched for in advance and only the bytes in front of it are parsed.
+    # Hence parsing stops at the first error and every page of a mapped file is touched once
+    def feedBytes(self, data):
+        parser = self.parser
+        translate = parser.byteTerminalIds.__getitem__
+        with memoryview(data) as view:
+            if self.result is not None or not view:
+                return self.feedIds(())
+
+            for start in range(0, len(view), self.byteBlockSize):
+                with view[start:start + self.byteBlockSize] as block:
+                    unknownByte = parser.unknownBytePattern.search(block) if parser.unknownBytePattern else None
+                    end = unknownByte.start() if unknownByte else len(block)
+                    with block[:end] as prefix:
+                        terminals = map(translate, prefix)
+                        if unknownByte:
+                            terminals = chain(terminals, self.unknownByte(unknownByte.group()))
+                        if self.feedIds(terminals) is False:
+                            return False
+        return None
+
+    # raises the error of an unknown byte once feedIds has consumed the bytes in front of it, like
+    # terminalIds does for unknown tokens
+    def unknownByte(self, byte):
+        self.result = False
+        self.report()
+        raise RuntimeError(f"Unknown token: {byte!r} at byte {self.position}")
+        yield
+
+    # like feed for an async iterator of chunks, e.g. lists of tokens, strings or bytes, or for the
+    # bytes of an asyncio.StreamReader, read chunkSize bytes at a time. The source is only awaited
+    # once the previous chunk is consumed, the tokens of a chunk are consumed in one synchronous
+    # burst. After every burst other tasks get the chance to run, even if the source never has to
+    # wait
+    async def feedAsync(self, source, chunkSize=65536):
+        if isinstance(source, asyncio.StreamReader):
+            self.unit = "byte"
+            while chunk := await source.read(chunkSize):
+                if self.feedBytes(chunk) is False:
+                    return False
+                await asyncio.sleep(0)
+            return None
+
+        # chunks of bytes are parsed like those of a StreamReader
+        async for chunk in source:
+            if isinstance(chunk, (bytes, bytearray, memoryview)):
+                self.unit = "byte"
+                if self.feedBytes(chunk) is False:
+                    return False
+            elif self.feed(chunk) is False:
+                return False
+            await asyncio.sleep(0)
+        return None
+
+    def terminalIds(self, tokens):
+        terminalIds = self.parser.terminalIds
+        classifyToken = self.parser.classifyToken
+        for token in tokens:
+            terminal = terminalIds.get(token)
+            if terminal is None:
+                terminal = classifyToken(token)
+                if terminal is None:
+                    # the input is rejected, even if the error is caught and the parser is finished
+                    self.result = False
+                    self.report()
+                    raise RuntimeError(f"Unknown token: {token}")
+            yield terminal
+
+    # signals the end of input and returns whether the input is accepted
+    def finish(self):
+        if self.result is None:
+            self.result = self.consume(self.parser.endOfInputId)
+            self.report()
+        return self.result
+
+    # reports the outcome and the number of consumed tokens to the hook of the parser, once per
+    # parse. Only InstrumentedStreamingParser counts its steps, the other engines report none
+    def report(self):
+        if self.statistics is not None and self.statistics.accepted is None:
+            self.statistics.accepted = self.result
+            self.statistics.tokens = self.position
+            self.parser.instrumentation.parse(self.statistics)
+
+    # the helpers below are shared by the consume loops of all engines, they are only called for
+    # printStack and on errors and therefore do not slow down the loops
+
+    # prints the items of the stack and the lookahead
+    def showStack(self, lookahead):
+        print([Item(*self.parser.rules[production], marker) for production, marker in zip(self.productionStack, self.markerStack)], self.parser.terminalName(lookahead))
+
+    # the item on top of the stack, whose marker is in front of the symbol which failed
+    def topItem(self):
+        return Item(*self.parser.rules[self.productionStack[-1]], self.markerStack[-1])
+
+    def expansionError(self, lookahead):
+        self.errorMessage.show(f"Parsing error at {self.unit} {self.position}: Cannot expand {self.topItem()} for lookahead: \'{self.parser.terminalName(lookahead)}\'")
+
+    def shiftError(self, lookahead):
+        self.errorMessage.show(f"Parsing error at {self.unit} {self.position}: {self.topItem()} could neither be expanded, shifted nor reduced for lookahead: \'{self.parser.terminalName(lookahead)}\'")
+
+    # expands and reduces until the lookahead can be shifted, returns False on a parsing error
+    def consume(self, lookahead):
+        productionCodes = self.parser.productionCodes
+        lookaheadTable = self.parser.lookaheadTable
+        productionStack = self.productionStack
+        markerStack = self.markerStack
+        printStack = self.printStack
+
+        while True:
+            if printStack:
+                self.showStack(lookahead)
+            rightHandSide = productionCodes[productionStack[-1]]
+            marker = markerStack[-1]
+            #reduce: the production on top of the stack was completed, pop it and advance the marker below
+            if marker == len(rightHandSide):
+                productionStack.pop()
+                markerStack.pop()
+                markerStack[-1] += 1
+                continue
+
+            symbol = rightHandSide[marker]
+            #expand: apply expansion rule given the next lookahead symbol
+            if symbol >= 0:
+                production = lookaheadTable[symbol + lookahead]
+                if production < 0:
+                    self.expansionError(lookahead)
+                    return False
+                # a nonterminal at the end of a right hand side replaces the frame of its
+                # production, which would be reduced right after it anyway. Hence right recursion
+                # does not grow the stack and its depth only reflects the nesting of the input
+                if marker + 1 == len(rightHandSide):
+                    productionStack[-1] = production
+                    markerStack[-1] = 0
+                else:
+                    productionStack.append(production)
+                    markerStack.append(0)
+            #shift: the lookahead is consumed, shifting $ at the end of input accepts the word
+            elif ~symbol == lookahead:
+                markerStack[-1] += 1
+                return True
+            else:
+                self.shiftError(lookahead)
+                return False
+
+
+# StreamingParser for a parser with compiled regular nonterminals, see
+# LL1Parser.compileRegularSubsets. A compiled nonterminal is not expanded but replaced by a frame
+# running its DFA, with the production id dfaFrame and the offset of the row of the current state
+# as marker. Such a frame consumes a token by a single lookup in the table of the DFA
+class DFAStreamingParser(StreamingParser):
+
+    engine = "dfa"
+
+    # tokens read by a DFA frame are consumed right here, only the others go through consume
+    def feedIds(self, chunk):
+        if self.result is not None:
+            if self.result:
+                raise RuntimeError("Cannot feed a finished parser")
+            return False
+
+        dfaTable = self.parser.dfaTable
+        dfaFrame = self.parser.dfaFrame
+        productionStack = self.productionStack
+        markerStack = self.markerStack
+
+        for terminal in chunk:
+            if productionStack[-1] == dfaFrame:
+                state = dfaTable[markerStack[-1] + terminal]
+                if state >= 0:
+                    markerStack[-1] = state
+                    self.position += 1
+                    continue
+            if not self.consume(terminal):
+                self.result = False
+                self.report()
+                return False
+            self.position += 1
+        return None
+
+    def consume(self, lookahead):
+        productionCodes = self.parser.dfaProductionCodes
+        lookaheadTable = self.parser.lookaheadTable
+        dfaTable = self.parser.dfaTable
+        dfaBase = self.parser.dfaBase
+        dfaFrame = self.parser.dfaFrame
+        productionStack = self.productionStack
+        markerStack = self.markerStack
+
+        while True:
+            production = productionStack[-1]
+            if production == dfaFrame:
+                state = dfaTable[markerStack[-1] + lookahead]
+                if state >= 0:
+                    markerStack[-1] = state
+                    return True
+                #exit: the nonterminal of the DFA is completed, the lookahead belongs to the frames below
+                if state == LL1Parser.exitTransition:
+                    productionStack.pop()
+                    markerStack.pop()
+                    markerStack[-1] += 1
+                    continue
+                self.errorMessage.show(f"Parsing error at {self.unit} {self.position}: {self.parser.dfaNonTerminals[markerStack[-1] // self.parser.width]} cannot be continued for lookahead: \'{self.parser.terminalName(lookahead)}\'")
+                return False
+
+            rightHandSide = productionCodes[production]
+            marker = markerStack[-1]
+            if marker == len(rightHandSide):
+                productionStack.pop()
+                markerStack.pop()
+                markerStack[-1] += 1
+                continue
+
+            symbol = rightHandSide[marker]
+            #enter: the frame of a compiled nonterminal starts in the start state of its DFA
+            if symbol >= dfaBase:
+                if marker + 1 == len(rightHandSide):
+                    productionStack[-1] = dfaFrame
+                    markerStack[-1] = symbol - dfaBase
+                else:
+                    productionStack.append(dfaFrame)
+                    markerStack.append(symbol - dfaBase)
+            elif symbol >= 0:
+                production = lookaheadTable[symbol + lookahead]
+                if production < 0:
+                    self.expansionError(lookahead)
+                    return False
+                if marker + 1 == len(rightHandSide):
+                    productionStack[-1] = production
+                    markerStack[-1] = 0
+                else:
+                    productionStack.append(production)
+                    markerStack.append(0)
+            elif ~symbol == lookahead:
+                markerStack[-1] += 1
+                return True
+            else:
+                self.shiftError(lookahead)
+                return False
+
+
+# StreamingParser which counts its steps and reports them to the hook of the parser once the
+# input is accepted or rejected. It is only used if the parser has a hook and no compiled DFAs,
+# such that the counters do not cost anything otherwise
+class InstrumentedStreamingParser(StreamingParser):
+
+    # the loop of StreamingParser.consume with counters
+    def consume(self, lookahead):
+        productionCodes = self.parser.productionCodes
+        lookaheadTable = self.parser.lookaheadTable
+        productionStack = self.productionStack
+        markerStack = self.markerStack
+        statistics = self.statistics
+
+        while True:
+            if self.printStack:
+                self.showStack(lookahead)
+            rightHandSide = productionCodes[productionStack[-1]]
+            marker = markerStack[-1]
+            if marker == len(rightHandSide):
+                productionStack.pop()
+                markerStack.pop()
+                markerStack[-1] += 1
+                statistics.reductions += 1
+                continue
+
+            symbol = rightHandSide[marker]
+            if symbol >= 0:
+                production = lookaheadTable[symbol + lookahead]
+                if production < 0:
+                    self.expansionError(lookahead)
+                    return False
+                statistics.expansions += 1
+                # the replaced frame counts as a reduction, as in the item based engine
+                if marker + 1 == len(rightHandSide):
+                    productionStack[-1] = production
+                    markerStack[-1] = 0
+                    statistics.reductions += 1
+                else:
+                    productionStack.append(production)
+                    markerStack.append(0)
+                    if len(productionStack) > statistics.maxStackDepth:
+                        statistics.maxStackDepth = len(productionStack)
+            elif ~symbol == lookahead:
+                markerStack[-1] += 1
+                # shifting $ is not counted, as the item based engine accepts without shifting it
+                if lookahead != self.parser.endOfInputId:
+                    statistics.shifts += 1
+                return True
+            else:
+                self.shiftError(lookahead)
+                return False
+
+
+# StreamingParser which does not stop at the first error but records it as a ParsingError and
+# recovers in panic mode: a missing terminal is assumed to be inserted, a nonterminal which
+# cannot be expanded is skipped if the lookahead is in its Follow1 set and otherwise the
+# lookahead is discarded. Every step either advances a marker or consumes a token, so all errors
+# of the input are found in a single linear pass. To avoid cascades, no error is recorded
+# before a token was shifted again after the previous one
+class RecoveringParser(StreamingParser):
+
+    engine = "recovery"
+
+    def __init__(self, parser, printErrorMessages=False, printStack=False):
+        super().__init__(parser, printErrorMessages=printErrorMessages, printStack=printStack)
+        self.follow1Ids = parser.followIds()
+        self.errors = []
+        self.recovering = False
+        # position of the last token the start symbol was parsed again for
+        self.restartPosition = -1
+
+    # unknown tokens are recorded as errors and skipped
+    def terminalIds(self, tokens):
+        terminalIds = self.parser.terminalIds
+        classifyToken = self.parser.classifyToken
+        for token in tokens:
+            terminal = terminalIds.get(token)
+            if terminal is None:
+                terminal = classifyToken(token)
+                if terminal is None:
+                    self.recordError(ParsingError(self.unit, self.position, token, [], reason="Unknown token"))
+                    self.position += 1
+                    continue
+            yield terminal
+
+    # the input is accepted if no error was recorded
+    def finish(self):
+        if self.result is None:
+            self.consume(self.parser.endOfInputId)
+            self.result = not self.errors
+            self.report()
+        return self.result
+
+    def recordError(self, error):
+        self.recovering = True
+        self.errors.append(error)
+        self.errorMessage.show(str(error))
+
+    def unexpected(self, lookahead, expected):
+        if not self.recovering:
+            self.recordError(ParsingError(self.unit, self.position, self.parser.terminalName(lookahead), [self.parser.terminalName(terminal) for terminal in expected]))
+
+    def consume(self, lookahead):
+        productionCodes = self.parser.productionCodes
+        lookaheadTable = self.parser.lookaheadTable
+        productionStack = self.productionStack
+        markerStack = self.markerStack
+        endOfInputId = self.parser.endOfInputId
+
+        while True:
+            if self.printStack:
+                self.showStack(lookahead)
+            rightHandSide = productionCodes[productionStack[-1]]
+            marker = markerStack[-1]
+            if marker == len(rightHandSide):
+                productionStack.pop()
+                markerStack.pop()
+                markerStack[-1] += 1
+                continue
+
+            symbol = rightHandSide[marker]
+            if symbol >= 0:
+                production = lookaheadTable[symbol + lookahead]
+                if production >= 0:
+                    if marker + 1 == len(rightHandSide):
+                        productionStack[-1] = production
+                        markerStack[-1] = 0
+                    else:
+                        productionStack.append(production)
+                        markerStack.append(0)
+                    continue
+                self.unexpected(lookahead, [terminal for terminal in range(self.parser.width) if lookaheadTable[symbol + terminal] >= 0])
+                # synchronise: skip the nonterminal if the lookahead can follow it, else discard the lookahead
+                if lookahead == endOfInputId or lookahead in self.follow1Ids[symbol]:
+                    markerStack[-1] += 1
+                else:
+                    return True
+            elif ~symbol == lookahead:
+                markerStack[-1] += 1
+                if lookahead != endOfInputId:
+                    self.recovering = False
+                return True
+            else:
+                self.unexpected(lookahead, [~symbol])
+                # after the end of the word, the start symbol is parsed again if the lookahead can
+                # start a word, such that errors in the remaining input are still found. Other
+                # tokens are discarded, as well as a token the start symbol was already restarted
+                # on without shifting it. A missing terminal is assumed to be inserted
+                if ~symbol == endOfInputId:
+                    if lookaheadTable[rightHandSide[0] + lookahead] < 0 or self.restartPosition == self.position:
+                        return True
+                    self.restartPosition = self.position
+                    markerStack[-1] = 0
+                else:
+                    markerStack[-1] += 1
+
+
+# StreamingParser which additionally builds a ParseTree, with a node stack running parallel to
+# the production stack. The augmented start production has no node
+class TreeBuildingParser(StreamingParser):
+
+    engine = "tree"
+
+    def __init__(self, parser, actions=None, printErrorMessages=False, printStack=False):
+        super().__init__(parser, printErrorMessages=printErrorMessages, printStack=printStack)
+        self.tree = ParseTree(parser.rules, parser.terminalList)
+        self.nodeStack = [-1]
+
+        # callbacks are resolved once per production instead of once per reduction
+        self.callbacks = [None] * len(parser.rules)
+        for production, (A, rightHandSide) in enumerate(parser.rules):
+            if actions:
+                self.callbacks[production] = actions.get((A, tuple(rightHandSide)), actions.get(A))
+
+    def consume(self, lookahead):
+        productionCodes = self.parser.productionCodes
+        lookaheadTable = self.parser.lookaheadTable
+        productionStack = self.productionStack
+        markerStack = self.markerStack
+        nodeStack = self.nodeStack
+        tree = self.tree
+        position = self.position
+
+        while True:
+            if self.printStack:
+                self.showStack(lookahead)
+            rightHandSide = productionCodes[productionStack[-1]]
+            marker = markerStack[-1]
+            #reduce: the node of the completed production spans all tokens consumed since its expansion
+            if marker == len(rightHandSide):
+                node = nodeStack.pop()
+                tree.end[node] = position
+                callback = self.callbacks[productionStack.pop()]
+                if callback is not None:
+                    value = callback(tree.node(node))
+                    if value is not None:
+                        tree.values[node] = value
+                markerStack.pop()
+                markerStack[-1] += 1
+                continue
+
+            symbol = rightHandSide[marker]
+            #expand: the node of the expanded production becomes a child of the node below
+            if symbol >= 0:
+                production = lookaheadTable[symbol + lookahead]
+                if production < 0:
+                    self.expansionError(lookahead)
+                    return False
+                productionStack.append(production)
+                markerStack.append(0)
+                nodeStack.append(tree.addNode(ParseTree.nonTerminal, production, nodeStack[-1], position))
+            #shift: the consumed token becomes a leaf, $ at the end of input is not part of the tree
+            elif ~symbol == lookahead:
+                if lookahead != self.parser.endOfInputId:
+                    leaf = tree.addNode(ParseTree.terminal, lookahead, nodeStack[-1], position)
+                    tree.end[leaf] = position + 1
+                markerStack[-1] += 1
+                return True
+            else:
+                self.shiftError(lookahead)
+                return False
+
+
+# the parser used by the processes of LL1Parser.parseMany
+workerParser = None
+
+def setWorkerParser(parser):
+    global workerParser
+    workerParser = parser
+
+def initializeWorker(tables):
+    setWorkerParser(LL1Parser.fromTables(tables))
+
+def parseInWorker(tokens):
+    return parseWithErrorMessage(workerParser, tokens)
+
+# bytes are parsed like by parseFile, every byte being a token, instead of being iterated as ints
+def parseWithErrorMessage(parser, tokens):
+    stream = parser.stream()
+    try:
+        if isinstance(tokens, (bytes, bytearray)):
+            stream.unit = "byte"
+            accepted = stream.feedBytes(tokens) is not False and stream.finish()
+        else:
+            accepted = stream.feed(tokens) is not False and stream.finish()
+    except RuntimeError as error:
+        return (False, str(error))
+    return (accepted, stream.errorMessage.message)
+
 
 class Item:
     def __init__(self, leftHandSide, rightHandSide, marker=0):
@@ -108,9 +1104,27 @@ class Item:
     def __hash__(self):
         return hash(self.leftHandSide + self.rightHandSide + str(self.marker))
 
+# an error found by RecoveringParser, with the position of the offending token, the token and
+# the names of the terminals which were expected instead
+class ParsingError:
+    def __init__(self, unit, position, token, expected, reason=None):
+        self.unit = unit
+        self.position = position
+        self.token = token
+        self.expected = expected
+        self.reason = reason
+
+    def __repr__(self):
+        if self.reason is not None:
+            return f"Parsing error at {self.unit} {self.position}: {self.reason}: '{self.token}'"
+        expected = " or ".join(f"'{terminal}'" for terminal in self.expected)
+        return f"Parsing error at {self.unit} {self.position}: expected {expected} for lookahead: '{self.token}'"
+
 class ErrorMessage:
     def __init__(self):
         self.active = False
+        # the last message is kept even if messages are not printed
+        self.message = None
 
     def activate(self):
         self.active = True
@@ -119,5 +1133,6 @@ class ErrorMessage:
         self.active = False
 
     def show(self, message):
+        self.message = message
         if self.active:
             print(message)
\ No newline at end of file
@@ -0,0 +1,127 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from analysiscache import AnalysisCache
+from contextfreegrammar import Grammar
+from ll1parser import LL1Parser, parseWithErrorMessage
+
+# process wide registry of compiled parsers, such that equivalent grammar specifications which are
+# built in different places share one Grammar and LL1Parser. Specifications are identified by
+# AnalysisCache.key, hence the order of symbols and alternatives does not matter. The shared
+# parsers and their grammars are marked as shared and refuse to be edited by LL1Parser.update,
+# compileRegularSubsets, Grammar.addProduction or Grammar.removeProduction, as all users of the
+# registry would see the change
+class ParserRegistry:
+
+    def __init__(self, cache=None):
+        # an optional AnalysisCache, which additionally shares the analysis between processes
+        self.cache = cache
+        # a Future of the parser per key, which is resolved once the first caller has built it
+        self.parsers = dict()
+        self.resultCaches = dict()
+        self.lock = threading.Lock()
+
+    def key(self, startSymbol, terminals, nonTerminals, productions, compileRegularSubsets):
+        return (AnalysisCache.key(startSymbol, terminals, nonTerminals, productions), compileRegularSubsets)
+
+    # the parser of the specification, which is only built by the first caller. The parser is built
+    # outside the lock, such that other specifications are not blocked meanwhile, concurrent
+    # callers for the same specification wait for the first one
+    def parser(self, startSymbol, terminals, nonTerminals, productions, compileRegularSubsets=False):
+        key = self.key(startSymbol, terminals, nonTerminals, productions, compileRegularSubsets)
+        with self.lock:
+            future = self.parsers.get(key)
+            building = future is None
+            if building:
+                future = self.parsers[key] = Future()
+        if not building:
+            return future.result()
+
+        try:
+            parser = LL1Parser(Grammar(startSymbol, terminals, nonTerminals, productions, cache=self.cache))
+            if compileRegularSubsets:
+                parser.compileRegularSubsets()
+            parser.shared = True
+            parser.grammar.shared = True
+        except BaseException as error:
+            # the next caller tries again
+            with self.lock:
+                if self.parsers.get(key) is future:
+                    del self.parsers[key]
+            future.set_exception(error)
+            raise
+        future.set_result(parser)
+        return parser
+
+    # the ParseResultCache of the parser of the specification, shared like the parser itself. All
+    # callers have to agree on its size
+    def resultCache(self, startSymbol, terminals, nonTerminals, productions, compileRegularSubsets=False, maxSize=1024):
+        parser = self.parser(startSymbol, terminals, nonTerminals, productions, compileRegularSubsets)
+        key = self.key(startSymbol, terminals, nonTerminals, productions, compileRegularSubsets)
+        with self.lock:
+            resultCache = self.resultCaches.get(key)
+            if resultCache is None:
+                resultCache = self.resultCaches[key] = ParseResultCache(parser, maxSize=maxSize)
+        if resultCache.maxSize != maxSize:
+            raise ValueError(f"The parse result cache of the grammar already has the size {resultCache.maxSize}, not {maxSize}")
+        return resultCache
+
+    def clear(self):
+        with self.lock:
+            self.parsers.clear()
+            self.resultCaches.clear()
+
+
+# size bounded cache of the outcomes of LL1Parser.parseFast for repeated inputs. An outcome is the
+# pair (accepted, errorMessage) of LL1Parser.parseMany. If the cache is full, the least recently
+# used outcome is evicted. Inputs are keys, hence strings, bytes and tuples are used as they are
+# and other iterables are converted to tuples. Bytes are parsed byte by byte like by
+# LL1Parser.parseFile
+class ParseResultCache:
+
+    def __init__(self, parser, maxSize=1024):
+        if maxSize < 1:
+            raise ValueError("The size of a parse result cache has to be positive")
+        self.parser = parser
+        self.maxSize = maxSize
+        self.outcomes = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def parse(self, tokens):
+        key = tokens if isinstance(tokens, (str, bytes, tuple)) else tuple(tokens)
+        with self.lock:
+            outcome = self.outcomes.get(key)
+            if outcome is not None:
+                self.outcomes.move_to_end(key)
+                self.hits += 1
+                return outcome
+            self.misses += 1
+
+        # concurrent misses of the same input are parsed more than once, but the parser is not
+        # blocked for the other inputs
+        outcome = parseWithErrorMessage(self.parser, key)
+        with self.lock:
+            self.outcomes[key] = outcome
+            self.outcomes.move_to_end(key)
+            if len(self.outcomes) > self.maxSize:
+                self.outcomes.popitem(last=False)
+                self.evictions += 1
+        return outcome
+
+    def accepts(self, tokens):
+        return self.parse(tokens)[0]
+
+    def statistics(self):
+        with self.lock:
+            return {"size": len(self.outcomes), "maxSize": self.maxSize, "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def clear(self):
+        with self.lock:
+            self.outcomes.clear()
+
+
+# the registry shared by the whole process
+registry = ParserRegistry()
@@ -0,0 +1,126 @@
+from array import array
+
+# parse tree stored in flat parallel arrays indexed by node id instead of one object per node.
+# A nonterminal node refers to the production it was expanded with, a terminal node to the id
+# of its terminal. Spans are half open intervals of token positions. Children are linked through
+# firstChild/nextSibling, -1 marks a missing node
+class ParseTree:
+
+    nonTerminal = 0
+    terminal = 1
+
+    def __init__(self, rules, terminalList):
+        self.rules = rules
+        self.terminalList = terminalList
+
+        self.kind = array("b")
+        self.symbol = array("i")
+        self.parent = array("i")
+        self.firstChild = array("i")
+        self.lastChild = array("i")
+        self.nextSibling = array("i")
+        self.start = array("i")
+        self.end = array("i")
+
+        # results of the semantic actions, only stored for nodes whose action returned a value
+        self.values = dict()
+
+    def __len__(self):
+        return len(self.kind)
+
+    def addNode(self, kind, symbol, parent, start):
+        node = len(self.kind)
+        self.kind.append(kind)
+        self.symbol.append(symbol)
+        self.parent.append(parent)
+        self.firstChild.append(-1)
+        self.lastChild.append(-1)
+        self.nextSibling.append(-1)
+        self.start.append(start)
+        self.end.append(start)
+
+        if parent >= 0:
+            if self.lastChild[parent] < 0:
+                self.firstChild[parent] = node
+            else:
+                self.nextSibling[self.lastChild[parent]] = node
+            self.lastChild[parent] = node
+        return node
+
+    def children(self, node):
+        child = self.firstChild[node]
+        while child >= 0:
+            yield child
+            child = self.nextSibling[child]
+
+    # node ids in pre-order, which is the order in which the nodes were created
+    def walk(self):
+        return iter(range(len(self.kind)))
+
+    def root(self):
+        return Node(self, 0)
+
+    def node(self, node):
+        return Node(self, node)
+
+    def __repr__(self):
+        return repr(self.root())
+
+
+# lightweight view on a node of a ParseTree, which is only created when it is accessed
+class Node:
+    __slots__ = ("tree", "id")
+
+    def __init__(self, tree, id):
+        self.tree = tree
+        self.id = id
+
+    def isTerminal(self):
+        return self.tree.kind[self.id] == ParseTree.terminal
+
+    def production(self):
+        return None if self.isTerminal() else self.tree.rules[self.tree.symbol[self.id]]
+
+    def symbol(self):
+        return self.tree.terminalList[self.tree.symbol[self.id]] if self.isTerminal() else self.production()[0]
+
+    def span(self):
+        return (self.tree.start[self.id], self.tree.end[self.id])
+
+    def value(self):
+        return self.tree.values.get(self.id)
+
+    def parent(self):
+        parent = self.tree.parent[self.id]
+        return Node(self.tree, parent) if parent >= 0 else None
+
+    def children(self):
+        return [Node(self.tree, child) for child in self.tree.children(self.id)]
+
+    def __eq__(self, other):
+        return isinstance(other, Node) and self.tree is other.tree and self.id == other.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    # written with an explicit stack of node ids and pending strings, such that deep trees do not
+    # exceed the recursion limit
+    def __repr__(self):
+        tree = self.tree
+        parts = []
+        stack = [self.id]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                parts.append(node)
+            elif tree.kind[node] == ParseTree.terminal:
+                parts.append(repr(tree.terminalList[tree.symbol[node]]))
+            else:
+                parts.append(f"{tree.rules[tree.symbol[node]][0]}(")
+                stack.append(")")
+                children = list(tree.children(node))
+                for index in reversed(range(len(children))):
+                    stack.append(children[index])
+                    if index > 0:
+                        stack.append(", ")
+        return "".join(parts)
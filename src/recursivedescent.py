@@ -0,0 +1,222 @@
+import unicode
+from contextfreegrammar import concat1, CharacterClass, sequenceOrder, symbolOrder
+from ll1parser import Item
+
+# generates the source code of a standalone recursive descent parser from an analysed LL(1)
+# grammar. The generated module does not import anything from this project, all lookahead
+# sets are computed at generation time and written out as literals
+class RecursiveDescentGenerator:
+
+    def __init__(self, grammar):
+        self.grammar = grammar
+
+        if not self.grammar.isLL1():
+            raise ValueError("Grammar is not LL(1)")
+
+        self.functionNames = dict()
+        for A in self.grammar.nonTerminalList:
+            name = f"expand_{A}" if A.isidentifier() else f"expand_{self.grammar.nonTerminalIds[A]}"
+            while name in self.functionNames.values():
+                name += "_"
+            self.functionNames[A] = name
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(self.generate())
+
+    def generate(self):
+        # names of the continuation functions must not collide with the expand functions
+        self.generatedNames = set(self.functionNames.values())
+        lines = [
+            f"# recursive descent parser for the start symbol {self.grammar.startSymbol!r}, generated by",
+            "# recursivedescent.py from an LL(1) grammar. Do not edit, regenerate it instead",
+            "",
+            "from bisect import bisect_right",
+            "",
+            f"terminals = frozenset({[a for a in self.grammar.terminalList if not isinstance(a, CharacterClass)]!r})",
+            "# a token matching a character class is represented by the index of the class",
+            f"classIntervals = {self.classIntervals()!r}",
+            "classLows = [low for low, _, _ in classIntervals]",
+            "",
+            *self.runtime(),
+        ]
+
+        for A in self.grammar.nonTerminalList:
+            lines += self.nonTerminalFunction(A)
+
+        return "\n".join(lines) + "\n"
+
+    # the part of the generated module which does not depend on the grammar
+    def runtime(self):
+        startFunction = self.functionNames[self.grammar.startSymbol]
+        acceptItem = Item("S'", [self.grammar.startSymbol, "$"], marker=1)
+        return [
+            "class ParseError(Exception):",
+            "    pass",
+            "",
+            "class Tokens:",
+            "    def __init__(self, tokens):",
+            "        self.tokens = tokens",
+            "        # continuations of the partially parsed alternatives, innermost last",
+            "        self.stack = []",
+            "        self.advance()",
+            "",
+            "    def advance(self):",
+            "        try:",
+            "            self.token = self.lookahead = next(self.tokens)",
+            "        except StopIteration:",
+            "            self.token = self.lookahead = None",
+            "            return",
+            "        if self.lookahead not in terminals:",
+            "            self.lookahead = classify(self.token)",
+            "            if self.lookahead is None:",
+            "                raise RuntimeError(f\"Unknown token: {self.token}\")",
+            "",
+            "    def expect(self, terminal, item):",
+            "        if self.lookahead != terminal:",
+            "            self.fail(f\"{item} could neither be expanded, shifted nor reduced\")",
+            "        self.advance()",
+            "",
+            "    def fail(self, reason):",
+            "        raise ParseError(f\"Parsing error: {reason} for lookahead: '{'EOF' if self.token == None else self.token}'\")",
+            "",
+            "def classify(token):",
+            "    if not isinstance(token, str) or len(token) != 1:",
+            "        return None",
+            "    code = ord(token)",
+            "    index = bisect_right(classLows, code) - 1",
+            "    if index >= 0 and code <= classIntervals[index][1]:",
+            "        return classIntervals[index][2]",
+            "    return None",
+            "",
+            "# every expand function returns the function of the next nonterminal instead of calling it.",
+            "# The rest of the alternative is pushed onto state.stack as a continuation, unless the",
+            "# nonterminal is in tail position. Hence the nesting depth of the input is limited by memory",
+            "# only and not by the call stack of Python",
+            "def run(expand, state):",
+            "    stack = state.stack",
+            "    while True:",
+            "        while expand is not None:",
+            "            expand = expand(state)",
+            "        if not stack:",
+            "            return",
+            "        expand = stack.pop()",
+            "",
+            "def parse(tokens, printErrorMessages=False):",
+            "    state = Tokens(tokens)",
+            "    try:",
+            f"        run({startFunction}, state)",
+            "        if state.lookahead is not None:",
+            f"            state.fail({str(acceptItem) + ' could neither be expanded, shifted nor reduced'!r})",
+            "    except ParseError as error:",
+            "        if printErrorMessages:",
+            "            print(error)",
+            "        return False",
+            "    return True",
+            "",
+        ]
+
+    def nonTerminalFunction(self, A):
+        # alternatives with identical generated code, e.g. A -> a | b, share a branch
+        branches = dict()
+        continuations = []
+        for rightHandSide in sorted(self.grammar.delta[A], key=sequenceOrder):
+            lookaheadSymbols = concat1(self.grammar.first1(rightHandSide), self.grammar.follow1Set[A])
+            body = tuple(self.alternativeBody(A, rightHandSide, 0, continuations))
+            branches.setdefault(body, set()).update(lookaheadSymbols)
+
+        name = self.functionNames[A]
+        alternatives = [repr(rightHandSide) if rightHandSide else unicode.epsilon for rightHandSide in sorted(self.grammar.delta[A], key=sequenceOrder)]
+        lines = [f"# {A} {unicode.rightArrow} {' | '.join(alternatives)}"]
+        branchList = list(branches.items())
+
+        # the reduced grammar of an unproductive start symbol has no productions, no input is accepted
+        if not branchList:
+            lines += [
+                f"def {name}(state):",
+                f"    state.fail({self.expandReason(A)!r})",
+                "",
+            ]
+            return lines
+
+        if len(branchList) == 1:
+            body, lookaheadSymbols = branchList[0]
+            lines += [
+                f"{name}_lookaheads = frozenset({self.literals(lookaheadSymbols)!r})",
+                f"def {name}(state):",
+                f"    if state.lookahead not in {name}_lookaheads:",
+                f"        state.fail({self.expandReason(A)!r})",
+                *("    " + line for line in body),
+                "",
+                *continuations,
+            ]
+            return lines
+
+        dispatch = {symbol:index for index, (_, lookaheadSymbols) in enumerate(branchList) for symbol in self.literals(lookaheadSymbols)}
+        lines += [
+            f"{name}_branches = {dispatch!r}",
+            f"def {name}(state):",
+            f"    branch = {name}_branches.get(state.lookahead)",
+        ]
+        for index, (body, _) in enumerate(branchList):
+            lines.append(f"    {'if' if index == 0 else 'elif'} branch == {index}:")
+            lines += ["        " + line for line in body]
+        lines += [
+            "    else:",
+            f"        state.fail({self.expandReason(A)!r})",
+            "",
+            *continuations,
+        ]
+        return lines
+
+    # the code of rightHandSide[start:]. A nonterminal which is not in tail position ends the body,
+    # the symbols behind it are generated as a continuation function and appended to continuations
+    def alternativeBody(self, A, rightHandSide, start, continuations):
+        body = []
+        for index in range(start, len(rightHandSide)):
+            symbol = rightHandSide[index]
+            if symbol in self.grammar.nonTerminals:
+                if index < len(rightHandSide) - 1:
+                    continuation = self.continuationName(A)
+                    continuationBody = self.alternativeBody(A, rightHandSide, index + 1, continuations)
+                    continuations += [
+                        f"# {Item(A, rightHandSide, marker=index + 1)}",
+                        f"def {continuation}(state):",
+                        *("    " + line for line in continuationBody),
+                        "",
+                    ]
+                    body.append(f"state.stack.append({continuation})")
+                body.append(f"return {self.functionNames[symbol]}")
+                break
+            # a leading terminal was already checked by the dispatch on the lookahead
+            elif index == 0:
+                body.append("state.advance()")
+            else:
+                body.append(f"state.expect({self.literal(symbol)!r}, {str(Item(A, rightHandSide, marker=index))!r})")
+        return body or ["pass"]
+
+    def continuationName(self, A):
+        name = f"{self.functionNames[A]}_continue"
+        index = 0
+        while f"{name}_{index}" in self.generatedNames:
+            index += 1
+        self.generatedNames.add(f"{name}_{index}")
+        return f"{name}_{index}"
+
+    def expandReason(self, A):
+        return f"Cannot expand {A}"
+
+    # the intervals of all character classes as (low, high, index of the class)
+    def classIntervals(self):
+        classes = [a for a in self.grammar.terminalList if isinstance(a, CharacterClass)]
+        return sorted((low, high, index) for index, a in enumerate(classes) for low, high in a.intervals)
+
+    # the representation of a terminal as the lookahead of the generated parser
+    def literal(self, symbol):
+        if isinstance(symbol, CharacterClass):
+            return [a for a in self.grammar.terminalList if isinstance(a, CharacterClass)].index(symbol)
+        return symbol
+
+    # None, the end of input, is sorted in front of the terminals
+    def literals(self, symbols):
+        return [self.literal(symbol) for symbol in sorted(symbols, key=lambda symbol: (symbol is not None, symbolOrder(symbol) if symbol is not None else ()))]
@@ -22,29 +22,46 @@ class StronglyConnectedComponents:
 
         return self.sccs
 
-    def strongConnect(self, node):
+    # the depth first search keeps its own stack of nodes together with the iterator over their
+    # remaining successors instead of recursing, such that arbitrarily long dependency chains
+    # neither hit the recursion limit nor pay for a function call per node
+    def strongConnect(self, root):
+        self.visit(root)
+        searchStack = [(root, iter(self.graph[root]))]
+
+        while searchStack:
+            node, successors = searchStack[-1]
+            for successor in successors:
+                # if successor has not been visited yet, continue search from the successor and
+                # resume with the remaining successors of node afterwards
+                if successor not in self.indices:
+                    self.visit(successor)
+                    searchStack.append((successor, iter(self.graph[successor])))
+                    break
+                elif self.onStack[successor]:
+                    # Successor is in the stack and hence in the current SCC
+                    self.lowlink[node] = min(self.lowlink[node], self.indices[successor])
+            else:
+                # all successors of node are processed
+                searchStack.pop()
+                if searchStack:
+                    parent, _ = searchStack[-1]
+                    self.lowlink[parent] = min(self.lowlink[parent], self.lowlink[node])
+
+                # If node is a root node, pop the stack and generate an SCC
+                if self.lowlink[node] == self.indices[node]:
+                    scc = []
+                    while True:
+                        w = self.stack.pop()
+                        self.onStack[w] = False
+                        scc.append(w)
+                        if w == node:
+                            break
+                    self.sccs.append(scc)
+
+    def visit(self, node):
         self.indices[node] = self.index
         self.lowlink[node] = self.index
         self.index += 1
         self.stack.append(node)
         self.onStack[node] = True
-
-        for successor in self.graph[node]:
-            # if successor has not been visited yet, continue search recursively
-            if successor not in self.indices:
-                self.strongConnect(successor)
-                self.lowlink[node] = min(self.lowlink[node], self.lowlink[successor])
-            elif self.onStack[successor]:
-                # Successor is in the stack and hence in the current SCC
-                self.lowlink[node] = min(self.lowlink[node], self.indices[successor])
-
-        # If node is a root node, pop the stack and generate an SCC
-        if self.lowlink[node] == self.indices[node]:
-            scc = []
-            while True:
-                w = self.stack.pop()
-                self.onStack[w] = False
-                scc.append(w)
-                if w == node:
-                    break
-            self.sccs.append(scc)